@@ -0,0 +1,278 @@
+"""
+Load Image Brush Mask（ycimagebrushmask）笔刷遮罩性能基准
+
+不需要启动 ComfyUI：缺少 nodes / folder_paths 时用空模块代替，py/ 目录作为独立包加载。
+生成确定性的合成笔画（画布 512~8K、笔刷 1~200、不同点密度、画笔/橡皮擦比例），
+对每个用例报告：解析耗时、光栅化耗时、内存峰值（tracemalloc，只统计 numpy 侧分配）和输出校验值。
+
+用法：
+    python benchmarks/bench_brushmask.py                 # 完整网格
+    python benchmarks/bench_brushmask.py --quick         # 小网格，快速冒烟
+    python benchmarks/bench_brushmask.py --reference     # 同时跑旧版逐点盖圆实现并比较结果
+    python benchmarks/bench_brushmask.py --format text   # 解析文本格式笔画（默认为前端写入的 b1 二进制格式）
+    python benchmarks/bench_brushmask.py --json out.json # 保存结果
+    python benchmarks/bench_brushmask.py --compare out.json  # 与之前的结果比较校验值，不一致时返回 1
+"""
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+PY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "py")
+
+CANVAS_SIZES = (512, 1024, 2048, 4096, 8192)
+BRUSH_SIZES = (1, 8, 32, 100, 200)
+# 点密度：相邻采样点的平均间距（像素），越小点越密（接近鼠标事件的真实密度）
+POINT_SPACINGS = {"dense": 1.5, "medium": 6.0, "sparse": 40.0}
+ERASE_RATIOS = (0.0, 0.25, 0.5)
+
+QUICK_CANVAS_SIZES = (512, 2048)
+QUICK_BRUSH_SIZES = (1, 32, 200)
+
+
+def load_brushmask_module():
+    """在没有 ComfyUI 的环境中加载 py/Loadimage_brushmask.py。"""
+    for name in ("nodes", "folder_paths"):
+        if name in sys.modules:
+            continue
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            stub = types.ModuleType(name)
+            if name == "folder_paths":
+                tmp = tempfile.gettempdir()
+                stub.get_temp_directory = lambda: tmp
+                stub.get_input_directory = lambda: tmp
+                stub.get_output_directory = lambda: tmp
+            sys.modules[name] = stub
+
+    package = types.ModuleType("ycnodes_bench")
+    package.__path__ = [PY_DIR]
+    sys.modules["ycnodes_bench"] = package
+    return importlib.import_module("ycnodes_bench.Loadimage_brushmask")
+
+
+def load_stroke_encoder():
+    """前端 b1 二进制笔画编码的 Python 对照实现（需先调用 load_brushmask_module）。"""
+    return importlib.import_module("ycnodes_bench.utils.brush_codec").encode_binary_stroke
+
+
+def make_brush_data(rng, canvas, brush_size, spacing, erase_ratio, strokes, points_per_stroke,
+                    stroke_format="binary", encode_binary=None):
+    """
+    生成 brush_data：每条笔画是一段随机游走，少量点会落在画布外。
+    stroke_format：text 为文本格式；binary 为前端默认写入的 b1 二进制格式（encode_binary_stroke）；
+    mixed 两种格式逐条交替。坐标按前端的方式截断为整数，所以三种格式绘制结果相同。
+    """
+    out = []
+    for index in range(strokes):
+        mode = "erase" if rng.random() < erase_ratio else "brush"
+        start = rng.uniform(-0.05 * canvas, 1.05 * canvas, size=2)
+        angles = np.cumsum(rng.normal(0.0, 0.3, size=points_per_stroke))
+        steps = np.stack((np.cos(angles), np.sin(angles)), axis=1) * spacing
+        points = np.trunc(start + np.cumsum(steps, axis=0)).astype(np.int32)
+        if stroke_format == "binary" or (stroke_format == "mixed" and index % 2 == 0):
+            out.append(encode_binary(mode, brush_size, 1.0, points))
+            continue
+        coords = ";".join(f"{x},{y}" for x, y in points)
+        out.append(f"{mode}:{brush_size}:1:{coords}")
+    return "|".join(out)
+
+
+def mask_checksum(mask):
+    bits = np.packbits(np.asarray(mask) > 0.5)
+    return hashlib.sha1(bits.tobytes()).hexdigest()[:16]
+
+
+class LegacyStamper:
+    """旧版实现：逐个采样点用 numpy 盖圆（用于校验新光栅化器的输出，速度很慢）。"""
+
+    def render(self, parsed_strokes, width, height):
+        mask = np.zeros((height, width), dtype=np.float32)
+        for mode, radius, points in parsed_strokes:
+            points = [(int(x), int(y)) for x, y in points]
+            for i, (x, y) in enumerate(points):
+                if i > 0:
+                    px, py = points[i - 1]
+                    self._line(mask, px, py, x, y, radius, mode == "erase")
+                else:
+                    self._circle(mask, x, y, radius, mode == "erase")
+        return np.clip(mask, 0.0, 1.0)
+
+    def _circle(self, mask, x, y, radius, erase):
+        h, w = mask.shape
+        y_min, y_max = max(0, y - radius), min(h, y + radius + 1)
+        x_min, x_max = max(0, x - radius), min(w, x + radius + 1)
+        if x_max <= x_min or y_max <= y_min:
+            return
+        yy, xx = np.ogrid[y_min:y_max, x_min:x_max]
+        inside = (xx - x) ** 2 + (yy - y) ** 2 <= radius * radius
+        region = mask[y_min:y_max, x_min:x_max]
+        if erase:
+            region[inside] = 0.0
+        else:
+            np.maximum(region, inside.astype(np.float32), out=region)
+
+    def _line(self, mask, x1, y1, x2, y2, radius, erase):
+        if x1 == x2 and y1 == y2:
+            self._circle(mask, x1, y1, radius, erase)
+            return
+        dx, dy = x2 - x1, y2 - y1
+        length = np.sqrt(dx * dx + dy * dy)
+        step_size = max(1, radius // 3) if radius > 10 else 1
+        steps = max(1, int(length / step_size) + 1)
+        t_values = np.linspace(0, 1, steps + 1)
+        xs = (x1 + dx * t_values).astype(np.int32)
+        ys = (y1 + dy * t_values).astype(np.int32)
+        h, w = mask.shape
+        valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        for y, x in np.unique(np.column_stack((ys[valid], xs[valid])), axis=0):
+            self._circle(mask, int(x), int(y), radius, erase)
+
+
+def run_case(module, encode_binary, case, args):
+    canvas, brush_size, density, erase_ratio = case
+    density_id = list(POINT_SPACINGS).index(density)
+    rng = np.random.default_rng([args.seed, canvas, brush_size, int(erase_ratio * 100), density_id])
+    brush_data = make_brush_data(
+        rng, canvas, brush_size, POINT_SPACINGS[density], erase_ratio, args.strokes, args.points,
+        args.format, encode_binary,
+    )
+    node_cls = module.ycimagebrushmask
+
+    # 解析：与 _render_mask 相同的逐笔画解析
+    parse_times = []
+    for _ in range(args.repeat):
+        node = node_cls()
+        start = time.perf_counter()
+        parsed = [node._parse_stroke(s, brush_size, canvas, canvas) for s in brush_data.split("|")]
+        parse_times.append(time.perf_counter() - start)
+    parsed = [p for p in parsed if p is not None]
+
+    # 完整绘制（每次新建节点，避开增量缓存），光栅化耗时 = 总耗时 - 解析耗时
+    render_times = []
+    for _ in range(args.repeat):
+        node = node_cls()
+        start = time.perf_counter()
+        mask = node._render_mask(brush_data, brush_size, canvas, canvas, canvas, canvas, 1, 1, args.threads)
+        render_times.append(time.perf_counter() - start)
+    parse_s = min(parse_times)
+    raster_s = max(0.0, min(render_times) - parse_s)
+    checksum = mask_checksum(mask[0].numpy())
+    del mask
+
+    # 内存峰值单独测一次，避免 tracemalloc 的开销影响计时
+    tracemalloc.start()
+    node_cls()._render_mask(brush_data, brush_size, canvas, canvas, canvas, canvas, 1, 1, args.threads)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "canvas": canvas,
+        "brush": brush_size,
+        "density": density,
+        "erase": erase_ratio,
+        "format": args.format,
+        "points": int(sum(len(p[2]) for p in parsed)),
+        "parse_ms": round(parse_s * 1000, 2),
+        "raster_ms": round(raster_s * 1000, 2),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+        "checksum": checksum,
+    }
+
+    if args.reference and canvas <= args.reference_max_canvas:
+        start = time.perf_counter()
+        legacy = LegacyStamper().render(parsed, canvas, canvas)
+        result["reference_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result["reference_match"] = mask_checksum(legacy) == checksum
+    return result
+
+
+def case_key(result):
+    return (result["canvas"], result["brush"], result["density"], result["erase"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ycimagebrushmask 笔刷遮罩性能基准")
+    parser.add_argument("--quick", action="store_true", help="只跑小网格")
+    parser.add_argument("--canvas", type=int, nargs="+", help="画布边长列表（默认 512~8192）")
+    parser.add_argument("--brush", type=int, nargs="+", help="笔刷大小列表（默认 1~200）")
+    parser.add_argument("--strokes", type=int, default=20, help="每个用例的笔画数")
+    parser.add_argument("--points", type=int, default=200, help="每条笔画的点数")
+    parser.add_argument("--threads", type=int, default=1, help="光栅化线程数（0 = CPU 核数）")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数（取最小值）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=("text", "binary", "mixed"), default="binary",
+                        help="笔画格式（默认 binary，与前端一致）；不同格式的校验值应相同")
+    parser.add_argument("--reference", action="store_true", help="同时运行旧版盖圆实现并比较输出")
+    parser.add_argument("--reference-max-canvas", type=int, default=2048,
+                        help="只在不超过该边长的画布上运行旧版实现（旧版很慢）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果比较校验值")
+    args = parser.parse_args(argv)
+
+    canvases = args.canvas or (QUICK_CANVAS_SIZES if args.quick else CANVAS_SIZES)
+    brushes = args.brush or (QUICK_BRUSH_SIZES if args.quick else BRUSH_SIZES)
+    densities = ("dense", "sparse") if args.quick else tuple(POINT_SPACINGS)
+    erase_ratios = (0.0, 0.5) if args.quick else ERASE_RATIOS
+
+    module = load_brushmask_module()
+    encode_binary = load_stroke_encoder()
+    header = f"{'canvas':>6} {'brush':>5} {'density':>7} {'erase':>5} {'points':>7} " \
+             f"{'parse_ms':>9} {'raster_ms':>10} {'peak_mb':>8}  checksum"
+    if args.reference:
+        header += f"          {'ref_ms':>9}  ref"
+    print(header)
+
+    results = []
+    for case in itertools.product(canvases, brushes, densities, erase_ratios):
+        result = run_case(module, encode_binary, case, args)
+        results.append(result)
+        line = f"{result['canvas']:>6} {result['brush']:>5} {result['density']:>7} {result['erase']:>5} " \
+               f"{result['points']:>7} {result['parse_ms']:>9.2f} {result['raster_ms']:>10.2f} " \
+               f"{result['peak_mb']:>8.2f}  {result['checksum']}"
+        if "reference_match" in result:
+            line += f"  {result['reference_ms']:>9.2f}  {'ok' if result['reference_match'] else 'DIFF'}"
+        print(line, flush=True)
+
+    failed = [r for r in results if r.get("reference_match") is False]
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {case_key(r): r for r in json.load(f)}
+        for r in results:
+            old = baseline.get(case_key(r))
+            if old is None:
+                continue
+            if old["checksum"] != r["checksum"]:
+                failed.append(r)
+                print(f"checksum changed: {case_key(r)} {old['checksum']} -> {r['checksum']}")
+            else:
+                r["baseline_raster_ms"] = old["raster_ms"]
+        compared = [r for r in results if "baseline_raster_ms" in r]
+        if compared:
+            before = sum(r["baseline_raster_ms"] for r in compared)
+            after = sum(r["raster_ms"] for r in compared)
+            print(f"raster total: {before:.1f} ms -> {after:.1f} ms over {len(compared)} cases")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        print(f"{len(failed)} case(s) do not match")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -269,6 +269,10 @@ export function initInteractionBindings(node, state) {
             }
         }
 
+        if (widget.name === WIDGET_NAMES.IMAGE_FILE && widget.value) {
+            this.loadBackgroundImageFromFile(widget.value);
+        }
+
         if (widget.name === WIDGET_NAMES.IMAGE_BASE64) {
             if (widget.value) {
                 this.properties.imageBase64Data = widget.value;
@@ -288,39 +292,7 @@ export function initInteractionBindings(node, state) {
         input.onchange = e => {
             const file = e.target.files[0];
             if (!file) return;
-
-            const reader = new FileReader();
-            reader.onload = event => {
-                try {
-                    const dataURL = event.target.result;
-                    let base64String = dataURL;
-                    if (dataURL.includes(",")) {
-                        base64String = dataURL.split(",")[1];
-                    }
-
-                    this.properties.imageBase64Data = base64String;
-
-                    const imageBase64Widget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_BASE64);
-                    if (imageBase64Widget) {
-                        imageBase64Widget.value = base64String;
-                    }
-
-                    this.loadBackgroundImageFromBase64(dataURL);
-
-                    this.properties.brushPaths = [];
-                    this.properties.currentPath = [];
-
-                    console.log("Image loaded successfully, size:", base64String.length, "bytes");
-                } catch (err) {
-                    console.error("Error processing image file:", err);
-                    alert("加载图片失败: " + err.message);
-                }
-            };
-            reader.onerror = err => {
-                console.error("Error reading file:", err);
-                alert("读取文件失败");
-            };
-            reader.readAsDataURL(file);
+            this.setBackgroundFile(file);
         };
         input.click();
     };
@@ -380,6 +352,99 @@ export function initInteractionBindings(node, state) {
         colorInput.click();
     };
 
+    // 上传到 ComfyUI input 目录，image_file 只保存文件引用，避免工作流/提示词里塞入整张 base64 图片；
+    // 上传失败时回退到旧的 base64 方式
+    node.setBackgroundFile = async function (file) {
+        let meta = null;
+        try {
+            meta = await uploadImage(file);
+        } catch (err) {
+            console.warn("Upload failed, falling back to base64:", err);
+        }
+
+        this.properties.brushPaths = [];
+        this.properties.currentPath = [];
+
+        if (!meta) {
+            this.setBackgroundBase64(file);
+            return;
+        }
+
+        const value = JSON.stringify(meta);
+        const imageFileWidget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_FILE);
+        if (imageFileWidget) {
+            imageFileWidget.value = value;
+        }
+        const imageBase64Widget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_BASE64);
+        if (imageBase64Widget) {
+            imageBase64Widget.value = "";
+        }
+        this.properties.imageBase64Data = "";
+
+        this.loadBackgroundImageFromFile(value);
+        console.log("Image uploaded:", meta.filename);
+    };
+
+    node.setBackgroundBase64 = function (file) {
+        const reader = new FileReader();
+        reader.onload = event => {
+            try {
+                const dataURL = event.target.result;
+                let base64String = dataURL;
+                if (dataURL.includes(",")) {
+                    base64String = dataURL.split(",")[1];
+                }
+
+                this.properties.imageBase64Data = base64String;
+
+                const imageBase64Widget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_BASE64);
+                if (imageBase64Widget) {
+                    imageBase64Widget.value = base64String;
+                }
+                const imageFileWidget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_FILE);
+                if (imageFileWidget) {
+                    imageFileWidget.value = "";
+                }
+
+                this.loadBackgroundImageFromBase64(dataURL);
+
+                console.log("Image loaded successfully, size:", base64String.length, "bytes");
+            } catch (err) {
+                console.error("Error processing image file:", err);
+                alert("加载图片失败: " + err.message);
+            }
+        };
+        reader.onerror = err => {
+            console.error("Error reading file:", err);
+            alert("读取文件失败");
+        };
+        reader.readAsDataURL(file);
+    };
+
+    node.loadBackgroundImageFromFile = function (value) {
+        let meta = null;
+        try {
+            meta = typeof value === "string" ? JSON.parse(value) : value;
+        } catch (err) {
+            console.error("Invalid image file reference:", value);
+        }
+        if (!meta || !meta.filename) {
+            return;
+        }
+
+        const img = new Image();
+        img.onload = () => {
+            this.properties.backgroundImageObj = img;
+            this.updateImageSize(img.width, img.height);
+            this.updateThisNodeGraph?.();
+        };
+        img.onerror = err => {
+            console.error("Error loading background image from file:", err);
+            this.properties.backgroundImageObj = null;
+        };
+        img.src = `/view?filename=${encodeURIComponent(meta.filename)}&subfolder=${encodeURIComponent(meta.subfolder || "")}&type=${encodeURIComponent(meta.type || "input")}`;
+    };
+
     node.loadBackgroundImageFromBase64 = function (base64String) {
         if (!base64String || base64String.trim() === "") {
             this.properties.backgroundImageObj = null;
@@ -486,40 +551,7 @@ export function initInteractionBindings(node, state) {
                 return false;
             }
 
-            // 读取文件并转换为 base64
-            const reader = new FileReader();
-            reader.onload = event => {
-                try {
-                    const dataURL = event.target.result;
-                    let base64String = dataURL;
-                    if (dataURL.includes(",")) {
-                        base64String = dataURL.split(",")[1];
-                    }
-
-                    this.properties.imageBase64Data = base64String;
-
-                    const imageBase64Widget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_BASE64);
-                    if (imageBase64Widget) {
-                        imageBase64Widget.value = base64String;
-                    }
-
-                    this.loadBackgroundImageFromBase64(dataURL);
-
-                    // 清空画笔路径
-                    this.properties.brushPaths = [];
-                    this.properties.currentPath = [];
-
-                    console.log("Image loaded from drag & drop, size:", base64String.length, "bytes");
-                } catch (err) {
-                    console.error("Error processing dropped image:", err);
-                    alert("加载图片失败: " + err.message);
-                }
-            };
-            reader.onerror = err => {
-                console.error("Error reading dropped file:", err);
-                alert("读取文件失败");
-            };
-            reader.readAsDataURL(file);
+            this.setBackgroundFile(file);
 
             e.preventDefault();
             e.stopPropagation();
@@ -530,3 +562,17 @@ export function initInteractionBindings(node, state) {
         return false;
     };
 }
+
+async function uploadImage(file) {
+    const form = new FormData();
+    form.append("image", file, file.name);
+    form.append("type", "input");
+    const resp = await fetch("/upload/image", { method: "POST", body: form });
+    if (!resp.ok) throw new Error(`upload failed: ${resp.status}`);
+    const j = await resp.json();
+    return {
+        filename: j.name || file.name,
+        subfolder: j.subfolder || "",
+        type: j.type || "input"
+    };
+}
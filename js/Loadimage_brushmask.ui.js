@@ -3,7 +3,8 @@ export const WIDGET_NAMES = {
     BRUSH_SIZE: "brush_size",
     IMAGE_WIDTH: "image_width",
     IMAGE_HEIGHT: "image_height",
-    IMAGE_BASE64: "image_base64"
+    IMAGE_BASE64: "image_base64",
+    IMAGE_FILE: "image_file"
 };
 
 export function initUIBindings(node, state) {
@@ -190,8 +191,11 @@ export function initUIBindings(node, state) {
             }
         }
 
+        const imageFileWidget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_FILE);
         const imageBase64Widget = this.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_BASE64);
-        if (imageBase64Widget && imageBase64Widget.value) {
+        if (imageFileWidget && imageFileWidget.value) {
+            this.loadBackgroundImageFromFile(imageFileWidget.value);
+        } else if (imageBase64Widget && imageBase64Widget.value) {
             this.properties.imageBase64Data = imageBase64Widget.value;
             this.loadBackgroundImageFromBase64(imageBase64Widget.value);
         } else if (this.properties.imageBase64Data) {
@@ -523,6 +527,10 @@ export function syncBrushDataWidget(node) {
         const mode = pathObj.mode || "brush";
         const size = pathObj.size !== undefined ? pathObj.size : node.properties.brushSize;
         const opacity = pathObj.opacity !== undefined ? pathObj.opacity : node.properties.brushOpacity;
+        const binary = encodeBinaryStroke(mode, size, opacity, path);
+        if (binary) {
+            return binary;
+        }
         const pointsStr = path.map(p => `${p.x},${p.y}`).join(";");
         return `${mode}:${size}:${opacity}:${pointsStr}`;
     });
@@ -563,11 +571,94 @@ function setupHiddenWidgets(node) {
         imageBase64Widget.hidden = true;
     }
 
+    const imageFileWidget = node.widgets.find(w => w.name === WIDGET_NAMES.IMAGE_FILE);
+    if (imageFileWidget) {
+        imageFileWidget.hidden = true;
+    }
+
+    // 前端补充的尺寸控件紧跟在 image_base64 之后，保证旧工作流的 widgets_values 顺序仍然对得上
+    for (const [offset, widget] of [widthWidget, heightWidget].entries()) {
+        node.widgets.splice(node.widgets.indexOf(widget), 1);
+        node.widgets.splice(node.widgets.indexOf(imageBase64Widget) + 1 + offset, 0, widget);
+    }
+
     node.properties.backgroundImageObj = null;
     node.properties.imageBase64Data = "";
 }
 
+// 紧凑二进制笔画（与 py/utils/brush_codec.py 对应）：
+// b1:<base64>，小端 header <BBHfI（mode, flags, size, opacity, 点数）+ int16 坐标（首点绝对值，其余为增量）
+const BINARY_STROKE_PREFIX = "b1:";
+const BINARY_HEADER_SIZE = 12;
+
+function encodeBinaryStroke(mode, size, opacity, path) {
+    const buffer = new ArrayBuffer(BINARY_HEADER_SIZE + path.length * 4);
+    const view = new DataView(buffer);
+    view.setUint8(0, mode === "erase" ? 1 : 0);
+    view.setUint8(1, 0);
+    view.setUint16(2, Math.max(0, Math.min(65535, Math.round(size))), true);
+    view.setFloat32(4, opacity, true);
+    view.setUint32(8, path.length, true);
+
+    let prevX = 0;
+    let prevY = 0;
+    for (let i = 0; i < path.length; i++) {
+        // 与后端文本解析 int(float(v)) 一致：截断为整数
+        const x = Math.trunc(path[i].x);
+        const y = Math.trunc(path[i].y);
+        const dx = x - prevX;
+        const dy = y - prevY;
+        if (dx < -32768 || dx > 32767 || dy < -32768 || dy > 32767) {
+            return null;
+        }
+        view.setInt16(BINARY_HEADER_SIZE + i * 4, dx, true);
+        view.setInt16(BINARY_HEADER_SIZE + i * 4 + 2, dy, true);
+        prevX = x;
+        prevY = y;
+    }
+
+    const bytes = new Uint8Array(buffer);
+    let binaryString = "";
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binaryString += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    }
+    return BINARY_STROKE_PREFIX + btoa(binaryString);
+}
+
+function decodeBinaryStroke(stroke) {
+    const binaryString = atob(stroke.slice(BINARY_STROKE_PREFIX.length).trim());
+    const bytes = new Uint8Array(binaryString.length);
+    for (let i = 0; i < binaryString.length; i++) {
+        bytes[i] = binaryString.charCodeAt(i);
+    }
+    const view = new DataView(bytes.buffer);
+    const count = view.getUint32(8, true);
+    const path = [];
+    let x = 0;
+    let y = 0;
+    for (let i = 0; i < count && BINARY_HEADER_SIZE + i * 4 + 4 <= bytes.length; i++) {
+        x += view.getInt16(BINARY_HEADER_SIZE + i * 4, true);
+        y += view.getInt16(BINARY_HEADER_SIZE + i * 4 + 2, true);
+        path.push({ x, y });
+    }
+    return {
+        points: path,
+        mode: view.getUint8(0) === 1 ? "erase" : "brush",
+        size: view.getUint16(2, true),
+        opacity: Math.round(view.getFloat32(4, true) * 100) / 100
+    };
+}
+
 function parseStroke(stroke) {
+    if (stroke.startsWith(BINARY_STROKE_PREFIX)) {
+        try {
+            return decodeBinaryStroke(stroke);
+        } catch (e) {
+            console.error("Error decoding binary stroke:", e);
+            return { points: [], mode: "brush", size: 20, opacity: 1.0 };
+        }
+    }
+
     let mode = "brush";
     let size = 20;
     let opacity = 1.0;
@@ -0,0 +1,101 @@
+import json
+
+import nodes
+import numpy as np
+
+from .utils.bbox import BBOXES_TYPE, BBoxSet
+from .utils.bbox_ops import (
+    DENSE_IOU_MAX_PAIRS, box_areas, containment_pairs, iou_matrix, iou_pairs_above, nearest_boxes, nms,
+)
+
+class ycBBoxAnalytics:
+    """
+    区域分析节点（输入 Canvas BBox / Canvas BBox Mask 的 bboxes）：
+    - nms：贪心非极大值抑制，去掉重叠的重复框，输出保留下来的区域集合
+    - iou_matrix：IoU 大于 iou_threshold 的框对 [i, j, iou]（框少时附带完整的 N x M 矩阵）
+    - containment：完全包含关系（外框序号:内框序号）
+    - nearest：每个框中心点最近的框
+    不连接 other_bboxes 时在同一组框内部比较。框数较多时用均匀网格只计算可能相交的框对。
+    """
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "bboxes": (BBOXES_TYPE,),
+                "operation": (["nms", "iou_matrix", "containment", "nearest"], {"default": "nms"}),
+                "iou_threshold": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0, "step": 0.01}),
+                # NMS 的优先顺序：按输入顺序或面积从大到小
+                "nms_order": (["input_order", "largest_first"], {"default": "input_order"}),
+            },
+            "optional": {
+                "other_bboxes": (BBOXES_TYPE,),
+            },
+        }
+
+    RETURN_TYPES = (BBOXES_TYPE, "STRING", "STRING", "INT")
+    RETURN_NAMES = ("bboxes", "indices", "report", "count")
+
+    FUNCTION = "main"
+    CATEGORY = 'YCNode/utils'
+
+    def main(self, bboxes, operation, iou_threshold, nms_order, other_bboxes=None):
+        """
+        返回:
+            bboxes: nms 时为保留下来的区域，其他操作原样输出
+            indices: nms 为保留的序号（按输入顺序）；iou_matrix 为 IoU 超过阈值的 "i:j" 对；containment 为 "外框:内框" 对；nearest 为每个框最近的框序号（-1 表示没有）
+            report: JSON 格式的详细结果
+            count: indices 中的条目数
+        """
+        a = bboxes.xyxy()
+        b = a if other_bboxes is None else other_bboxes.xyxy()
+
+        if operation == "nms":
+            order = None
+            if nms_order == "largest_first":
+                order = np.argsort(-box_areas(a), kind="stable")
+            # 保留的框按输入顺序输出，indices 第 k 项即输出 bboxes 中第 k 个框的原序号
+            keep = np.sort(nms(a, iou_threshold, order))
+            kept = BBoxSet(bboxes.canvas_width, bboxes.canvas_height, bboxes.boxes[keep])
+            items = [int(i) for i in keep]
+            report = {"kept": items, "removed": sorted(set(range(len(a))) - set(items))}
+            return (kept, ",".join(map(str, items)), json.dumps(report), len(items))
+
+        if operation == "iou_matrix":
+            rows, cols, iou = iou_pairs_above(a, b, iou_threshold)
+            if other_bboxes is None:
+                upper = rows < cols
+                rows, cols, iou = rows[upper], cols[upper], iou[upper]
+            report = {
+                "shape": [len(a), len(b)],
+                "pairs": [[int(i), int(j), round(float(v), 4)] for i, j, v in zip(rows, cols, iou)],
+            }
+            # 完整矩阵只在框少时输出，框多时 N x M 的 JSON 会占满内存
+            if len(a) * len(b) <= DENSE_IOU_MAX_PAIRS:
+                report["iou"] = np.round(iou_matrix(a, b), 4).tolist()
+            items = [f"{i}:{j}" for i, j in zip(rows, cols)]
+            return (bboxes, ",".join(items), json.dumps(report), len(items))
+
+        if operation == "containment":
+            pairs = containment_pairs(a, b)
+            if other_bboxes is None:
+                pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+            items = [f"{i}:{j}" for i, j in pairs]
+            report = {"contains": [[int(i), int(j)] for i, j in pairs]}
+            return (bboxes, ",".join(items), json.dumps(report), len(items))
+
+        index, distance = nearest_boxes(a, b, exclude_same_index=other_bboxes is None)
+        items = [int(i) for i in index]
+        report = {
+            "nearest": items,
+            "distance": [round(float(d), 2) if np.isfinite(d) else None for d in distance],
+        }
+        return (bboxes, ",".join(map(str, items)), json.dumps(report), len(items))
+
+# author.yichengup.BBoxAnalytics 2025.01.XX
+
+NODE_CLASS_MAPPINGS = {
+    "ycBBoxAnalytics": ycBBoxAnalytics,
+}
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "ycBBoxAnalytics": "BBox Analytics"
+}
@@ -1,9 +1,13 @@
 
 import nodes
 
+from .utils.bbox import BBOX_FORMATS, BBOXES_TYPE, convert_boxes, format_boxes, parse_bbox_string
+
 class ycBBoxBridge:
     """
     桥接节点：将Canvas BBox的输出转换为WithAnyoneSinglePersonConditioningNode可以接受的格式
+    - 支持一次转换多个框（"x,y,w,h;x,y,w,h;..." 或 bboxes 区域集合），numpy 一次算完
+    - 可选输出格式：归一化 xyxy（WithAnyone）、归一化 cxcywh、像素 xyxy、COCO
     """
     @classmethod
     def INPUT_TYPES(s):
@@ -13,64 +17,53 @@ class ycBBoxBridge:
                 "height": ("INT", {"default": 512, "min": 64, "max": 4096}),
                 "canvas_bbox": ("STRING", {"default": "", "multiline": False}),
             },
+            "optional": {
+                # Canvas BBox / Canvas BBox Mask 的 bboxes 输出；连接后忽略 canvas_bbox 字符串和 width/height
+                "bboxes": (BBOXES_TYPE,),
+                # 只转换第 bbox_index 个框；-1 为全部
+                "bbox_index": ("INT", {"default": -1, "min": -1, "max": 100000}),
+                "target_format": (BBOX_FORMATS, {"default": "withanyone"}),
+            },
         }
 
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("withanyone_bbox",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("withanyone_bbox", "bbox_list")
+    OUTPUT_IS_LIST = (False, True)
     FUNCTION = "main"
     CATEGORY = 'YCNode/utils'
 
-    def main(self, width, height, canvas_bbox):
+    def main(self, width, height, canvas_bbox, bboxes=None, bbox_index=-1, target_format="withanyone"):
         """
-        将Canvas BBox格式(x,y,width,height)转换为WithAnyone格式(x1_ratio,y1_ratio,x2_ratio,y2_ratio)
+        将Canvas BBox格式(x,y,width,height)转换为WithAnyone格式(x1_ratio,y1_ratio,x2_ratio,y2_ratio)或其他格式
 
         参数:
             width: 画布宽度
             height: 画布高度
-            canvas_bbox: Canvas BBox格式的字符串 "x,y,width,height"
+            canvas_bbox: Canvas BBox格式的字符串 "x,y,width,height"，多个框用 ";" 分隔
+            bboxes: 结构化的区域集合（可选），画布尺寸用集合自带的尺寸
+            bbox_index: 只转换第几个框，-1 为全部
+            target_format: 输出坐标格式
 
         返回:
-            WithAnyone格式的bbox字符串 "x1_ratio,y1_ratio,x2_ratio,y2_ratio"
+            用 ";" 连接的转换结果字符串（单个框时与原来一致），以及每个框一个字符串的列表
+            （没有框时为 [""]，空列表会让下游按列表执行的节点出错或不执行）
         """
-        if not canvas_bbox or not canvas_bbox.strip():
-            return ("",)
-
-        try:
-            # 解析Canvas BBox格式
-            coords = canvas_bbox.strip().split(',')
-            if len(coords) != 4:
-                raise ValueError("Invalid bbox format")
-
-            x = int(coords[0])
-            y = int(coords[1])
-            w = int(coords[2])
-            h = int(coords[3])
-
-            # 转换为WithAnyone格式
-            x1 = x
-            y1 = y
-            x2 = x + w
-            y2 = y + h
-
-            # 转换为相对比例 (0-1范围)
-            x1_ratio = x1 / width
-            y1_ratio = y1 / height
-            x2_ratio = x2 / width
-            y2_ratio = y2 / height
-
-            # 确保值在0-1范围内
-            x1_ratio = max(0, min(1, x1_ratio))
-            y1_ratio = max(0, min(1, y1_ratio))
-            x2_ratio = max(0, min(1, x2_ratio))
-            y2_ratio = max(0, min(1, y2_ratio))
+        if bboxes is not None:
+            # 结构化输入：直接取整数坐标，不经过字符串
+            boxes = bboxes.boxes
+            width, height = bboxes.canvas_width, bboxes.canvas_height
+        else:
+            if not canvas_bbox or not canvas_bbox.strip():
+                return ("", [""])
+            boxes = parse_bbox_string(canvas_bbox.strip())
 
-            # 返回WithAnyone格式的字符串
-            result = f"{x1_ratio:.4f},{y1_ratio:.4f},{x2_ratio:.4f},{y2_ratio:.4f}"
-            return (result,)
+        if bbox_index >= 0:
+            boxes = boxes[bbox_index:bbox_index + 1]
+        if len(boxes) == 0:
+            return ("", [""])
 
-        except Exception as e:
-            print(f"Error converting bbox: {e}")
-            return ("",)
+        results = format_boxes(convert_boxes(boxes, width, height, target_format), target_format)
+        return (";".join(results), results)
 
 # 注册节点
 NODE_CLASS_MAPPINGS = {
@@ -0,0 +1,81 @@
+import torch
+import nodes
+
+from .utils.bbox import BBOXES_TYPE, LABEL_MAP_TYPE
+
+class ycBBoxesToMasks:
+    """
+    区域集合转遮罩：
+    - 输入 Canvas BBox / Canvas BBox Mask 的 bboxes 输出（区域数量不限）
+    - 只为选中的区域范围生成遮罩批次，其余区域不分配内存
+    """
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "bboxes": (BBOXES_TYPE,),
+                "start_index": ("INT", {"default": 0, "min": 0, "max": 100000}),
+                # 0 表示从 start_index 到最后一个区域
+                "count": ("INT", {"default": 0, "min": 0, "max": 100000}),
+            },
+            "optional": {
+                # 羽化（高斯 sigma，像素），0 为硬边
+                "feather": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1024.0, "step": 0.5}),
+            },
+        }
+
+    RETURN_TYPES = ("MASK", "INT", "INT", "INT")
+    RETURN_NAMES = ("mask_batch", "count", "width", "height")
+
+    FUNCTION = "main"
+    CATEGORY = 'YCNode/Mask'
+
+    def main(self, bboxes, start_index, count, feather=0.0):
+        mask_batch = bboxes.to_masks(start_index, count or None, feather)
+        selected = mask_batch.shape[0]
+        if selected == 0:
+            # 没有选中任何区域时返回一个全黑遮罩
+            mask_batch = torch.zeros((1, bboxes.canvas_height, bboxes.canvas_width), dtype=torch.float32)
+        return (mask_batch, selected, bboxes.canvas_width, bboxes.canvas_height)
+
+class ycLabelMapToMasks:
+    """
+    标签图转遮罩：
+    - 输入 Canvas BBox Mask 的 label_map 输出
+    - 用一次广播比较拆出选中范围的区域遮罩（重叠部分按生成标签图时的规则归属）
+    """
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "label_map": (LABEL_MAP_TYPE,),
+                "start_index": ("INT", {"default": 0, "min": 0, "max": 100000}),
+                # 0 表示从 start_index 到最后一个区域
+                "count": ("INT", {"default": 0, "min": 0, "max": 100000}),
+            },
+        }
+
+    RETURN_TYPES = ("MASK", "INT")
+    RETURN_NAMES = ("mask_batch", "count")
+
+    FUNCTION = "main"
+    CATEGORY = 'YCNode/Mask'
+
+    def main(self, label_map, start_index, count):
+        mask_batch = label_map.to_masks(start_index, count or None)
+        selected = mask_batch.shape[0]
+        if selected == 0:
+            # 没有选中任何区域时返回一个全黑遮罩
+            mask_batch = torch.zeros((1,) + tuple(label_map.labels.shape), dtype=torch.float32)
+        return (mask_batch, selected)
+
+# author.yichengup.BBoxMasks 2025.01.XX
+
+NODE_CLASS_MAPPINGS = {
+    "ycBBoxesToMasks": ycBBoxesToMasks,
+    "ycLabelMapToMasks": ycLabelMapToMasks,
+}
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "ycBBoxesToMasks": "BBox Set to Masks",
+    "ycLabelMapToMasks": "Label Map to Masks",
+}
@@ -1,5 +1,7 @@
 import nodes
 
+from .utils.bbox import BBOXES_TYPE, BBoxSet
+
 class ycCanvasBBox:
     @classmethod
     def INPUT_TYPES(s):
@@ -11,40 +13,25 @@ class ycCanvasBBox:
             },
         }
 
-    RETURN_TYPES = ("INT", "INT", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING")
-    RETURN_NAMES = ("width", "height", "bbox_1", "bbox_2", "bbox_3", "bbox_4", "bbox_5", "bbox_6", "bbox_7", "bbox_8", "bbox_9", "bbox_10")
+    RETURN_TYPES = ("INT", "INT", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING", BBOXES_TYPE)
+    RETURN_NAMES = ("width", "height", "bbox_1", "bbox_2", "bbox_3", "bbox_4", "bbox_5", "bbox_6", "bbox_7", "bbox_8", "bbox_9", "bbox_10", "bboxes")
 
     FUNCTION = "main"
     CATEGORY = 'YCNode/utils'
 
     def main(self, canvas_width, canvas_height, bbox_data):
         # 解析bbox数据 - 格式为 "x1,y1,w1,h1;x2,y2,w2,h2;..."
-        bboxes = []
-        if bbox_data:
-            try:
-                bbox_parts = bbox_data.split(';')
-                for part in bbox_parts:
-                    if part.strip():
-                        coords = part.split(',')
-                        if len(coords) == 4:
-                            bboxes.append({
-                                'x': int(coords[0]),
-                                'y': int(coords[1]),
-                                'width': int(coords[2]),
-                                'height': int(coords[3])
-                            })
-            except:
-                bboxes = []
-
-        # 确保至少有10个bbox输出，如果没有则用空字符串填充
+        bboxes = BBoxSet.from_string(bbox_data, canvas_width, canvas_height)
+
+        # 确保至少有10个bbox输出，如果没有则用空字符串填充；超过10个的区域只在 bboxes 输出中
         bbox_strings = []
         for i in range(10):
             if i < len(bboxes):
-                bbox_strings.append(f"{bboxes[i]['x']},{bboxes[i]['y']},{bboxes[i]['width']},{bboxes[i]['height']}")
+                bbox_strings.append(bboxes.box_string(i))
             else:
                 bbox_strings.append("")
 
-        return (canvas_width, canvas_height, bbox_strings[0], bbox_strings[1], bbox_strings[2], bbox_strings[3], bbox_strings[4], bbox_strings[5], bbox_strings[6], bbox_strings[7], bbox_strings[8], bbox_strings[9])
+        return (canvas_width, canvas_height, bbox_strings[0], bbox_strings[1], bbox_strings[2], bbox_strings[3], bbox_strings[4], bbox_strings[5], bbox_strings[6], bbox_strings[7], bbox_strings[8], bbox_strings[9], bboxes)
 
 # author.yichengup.CanvasBBox 2025.11.10 
 
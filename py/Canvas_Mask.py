@@ -1,12 +1,16 @@
 import torch
 import nodes
 
+from .utils.bbox import BBOXES_TYPE, LABEL_MAP_TYPE, LABEL_OVERLAP_POLICIES, BBoxSet
+
 class ycCanvasBBoxMask:
     """
     画布遮罩节点：
     - 可以在画布上创建多个遮罩区域
     - 按顺序输出单独遮罩（每个区域在画布中显示白色）
     - 总输出端输出遮罩批次（包含所有遮罩）
+    - bboxes 输出全部区域的坐标（数量不限）
+    - label_map 输出整数标签图（像素值 = 区域序号，0 为背景），用 Label Map to Masks 按需拆分
     """
     @classmethod
     def INPUT_TYPES(s):
@@ -16,91 +20,65 @@ class ycCanvasBBoxMask:
                 "canvas_height": ("INT", {"default": 512, "min": 64, "max": 4096}),
                 "mask_data": ("STRING", {"default": "", "multiline": True}),
             },
+            "optional": {
+                # 关闭后所有遮罩输出（含 mask_batch）都是同一张 (1, H, W) 全黑遮罩，只分配一次；
+                # 区域用 bboxes 输出 + BBox Set to Masks 按需生成
+                "materialize_masks": ("BOOLEAN", {"default": True, "forceInput": True}),
+                # 标签图的重叠规则：last 后画的区域在上，first 先画的区域在上
+                "label_overlap": (LABEL_OVERLAP_POLICIES, {"default": "last", "forceInput": True}),
+                # 羽化（高斯 sigma，像素）：按轴解析计算软边，不需要再接全图模糊节点；0 为硬边
+                "feather": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1024.0, "step": 0.5, "forceInput": True}),
+            },
         }
 
     RETURN_TYPES = (
         "MASK", "MASK", "MASK", "MASK", "MASK", "MASK", "MASK", "MASK", "MASK", "MASK",  # 10个单独遮罩
         "MASK",  # 遮罩批次
         "INT", "INT",  # 画布尺寸
+        BBOXES_TYPE,  # 全部区域（数量不限，不含像素数据）
+        LABEL_MAP_TYPE,  # 整数标签图（uint8/int16/int32）
     )
     RETURN_NAMES = (
         "mask_1", "mask_2", "mask_3", "mask_4", "mask_5", "mask_6", "mask_7", "mask_8", "mask_9", "mask_10",
         "mask_batch",
         "width", "height",
+        "bboxes",
+        "label_map",
     )
 
     FUNCTION = "main"
     CATEGORY = 'YCNode/Mask'
 
-    def main(self, canvas_width, canvas_height, mask_data):
+    def main(self, canvas_width, canvas_height, mask_data, materialize_masks=True, label_overlap="last",
+             feather=0.0):
         # 解析mask数据 - 格式为 "x1,y1,w1,h1;x2,y2,w2,h2;..."
-        masks = []
-        if mask_data:
-            try:
-                mask_parts = mask_data.split(';')
-                for part in mask_parts:
-                    if part.strip():
-                        coords = part.split(',')
-                        if len(coords) == 4:
-                            masks.append({
-                                'x': int(coords[0]),
-                                'y': int(coords[1]),
-                                'width': int(coords[2]),
-                                'height': int(coords[3])
-                            })
-            except:
-                masks = []
+        bboxes = BBoxSet.from_string(mask_data, canvas_width, canvas_height)
+        count = len(bboxes)
+        label_map = bboxes.to_label_map(label_overlap)
 
-        # 创建单独遮罩（最多10个）
-        individual_masks = []
-        for i in range(10):
-            if i < len(masks):
-                mask_region = masks[i]
-                # 创建黑色遮罩
-                mask = torch.zeros((canvas_height, canvas_width), dtype=torch.float32)
-                # 将mask区域设置为白色（1.0）
-                x_start = max(0, mask_region['x'])
-                y_start = max(0, mask_region['y'])
-                x_end = min(canvas_width, mask_region['x'] + mask_region['width'])
-                y_end = min(canvas_height, mask_region['y'] + mask_region['height'])
-                
-                if x_end > x_start and y_end > y_start:
-                    mask[y_start:y_end, x_start:x_end] = 1.0
-                
-                # 添加batch维度: (1, H, W)
-                mask = mask.unsqueeze(0)
-            else:
-                # 创建全黑遮罩
-                mask = torch.zeros((1, canvas_height, canvas_width), dtype=torch.float32)
-            
-            individual_masks.append(mask)
+        if not materialize_masks:
+            empty_mask = torch.zeros((1, canvas_height, canvas_width), dtype=torch.float32)
+            return (empty_mask,) * 11 + (canvas_width, canvas_height, bboxes, label_map)
 
-        # 创建遮罩批次（只包含实际存在的mask区域）
-        if len(masks) > 0:
-            batch_masks = []
-            for mask_region in masks:
-                mask = torch.zeros((canvas_height, canvas_width), dtype=torch.float32)
-                x_start = max(0, mask_region['x'])
-                y_start = max(0, mask_region['y'])
-                x_end = min(canvas_width, mask_region['x'] + mask_region['width'])
-                y_end = min(canvas_height, mask_region['y'] + mask_region['height'])
-                
-                if x_end > x_start and y_end > y_start:
-                    mask[y_start:y_end, x_start:x_end] = 1.0
-                
-                batch_masks.append(mask)
-            
-            # 堆叠成批次: (N, H, W)
-            mask_batch = torch.stack(batch_masks, dim=0)
+        # 所有区域遮罩一次性写入预分配的 (N, H, W) 批次
+        if count > 0:
+            mask_batch = bboxes.to_masks(feather=feather)
+            empty_mask = torch.zeros((1, canvas_height, canvas_width), dtype=torch.float32)
         else:
             # 如果没有mask区域，返回一个全黑遮罩的批次
             mask_batch = torch.zeros((1, canvas_height, canvas_width), dtype=torch.float32)
+            empty_mask = mask_batch
+
+        # 单独遮罩（最多10个）是批次的视图，不再重复分配；空槽位共用同一个全黑遮罩
+        individual_masks = [mask_batch[i:i + 1] if i < count else empty_mask for i in range(10)]
 
         return (
             individual_masks[0], individual_masks[1], individual_masks[2], individual_masks[3], individual_masks[4],
             individual_masks[5], individual_masks[6], individual_masks[7], individual_masks[8], individual_masks[9],
             mask_batch,
-            canvas_width, canvas_height
+            canvas_width, canvas_height,
+            bboxes,
+            label_map,
         )
 
 # author.yichengup.CanvasBBoxMask 2025.01.XX
@@ -3,7 +3,18 @@ import numpy as np
 import nodes
 from PIL import Image
 import io
+import os
 import base64
+import hashlib
+
+from .utils.brush_codec import decode_binary_stroke, is_binary_stroke
+from .utils.brush_raster import TiledMask, scale_centers, simplify_stroke, stroke_centers
+from .utils.image_files import parse_image_ref, resolve_image_path
+from .utils.lru_cache import ByteLRUCache
+
+# 背景图解码缓存：按 base64 内容哈希或文件 (路径, 修改时间, 大小)，按字节数 LRU 淘汰
+# 上限通过环境变量 YC_BRUSHMASK_IMAGE_CACHE_MB 配置（默认 512MB，0 表示关闭）
+_IMAGE_CACHE = ByteLRUCache(int(os.environ.get("YC_BRUSHMASK_IMAGE_CACHE_MB", "512")) * 1024 * 1024)
 
 class ycimagebrushmask:
     @classmethod
@@ -14,43 +25,43 @@ class ycimagebrushmask:
                 "brush_size": ("INT", {"default": 80, "min": 1, "max": 200, "step": 1}),
                 "image_base64": ("STRING", {"default": "", "multiline": True}),
             },
+            "optional": {
+                # 上传到 ComfyUI input/temp 目录的图片引用（JSON 或 "sub/name.png [input]"），优先于 image_base64
+                "image_file": ("STRING", {"default": ""}),
+                # scaled_mask 的分辨率：直接在目标分辨率上光栅化（坐标与半径按比例缩放），而不是缩小整张遮罩
+                "mask_scale": (["1", "1/2", "1/4", "1/8", "custom"], {"default": "1"}),
+                "mask_width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1}),
+                "mask_height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 1}),
+                # 关闭后不再绘制全分辨率遮罩，mask 输出与 scaled_mask 相同
+                "full_res_mask": ("BOOLEAN", {"default": True}),
+                # 光栅化线程数：按横带并行填充，0 为自动（CPU 核数），1 为单线程
+                "raster_threads": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1}),
+                # 笔画简化容差（笔刷半径的比例）：去重复点 + RDP，删除点的偏移不超过 容差 x 半径 像素；0 为关闭
+                "simplify_tolerance": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1.0, "step": 0.05}),
+            },
         }
 
-    RETURN_TYPES = ( "IMAGE", "MASK","INT", "INT")
-    RETURN_NAMES = ("image", "mask", "width", "height")
+    RETURN_TYPES = ( "IMAGE", "MASK","INT", "INT", "MASK")
+    RETURN_NAMES = ("image", "mask", "width", "height", "scaled_mask")
 
     FUNCTION = "main"
     CATEGORY = 'YCNode/utils'
 
-    def main(self, brush_data, brush_size, image_base64):
-        # 从base64字符串加载图片
+    def __init__(self):
+        # 增量绘制缓存：{(输出宽, 输出高): (绘制参数, brush_data, TiledMask)}
+        self._stroke_cache = {}
+
+    def main(self, brush_data, brush_size, image_base64, image_file="",
+             mask_scale="1", mask_width=0, mask_height=0, full_res_mask=True, raster_threads=0,
+             simplify_tolerance=0.0):
+        # 优先从文件引用加载图片，没有或失败时回退到base64（相同内容命中解码缓存，跳过解码）
         background_img_tensor = None
         
-        if image_base64 and image_base64.strip():
-            # 从base64字符串加载图片
-            try:
-                # 处理可能的data URL格式（去掉前缀）
-                base64_data = image_base64.strip()
-                if ',' in base64_data:
-                    # 如果包含逗号，说明是data URL格式，取逗号后的部分
-                    base64_data = base64_data.split(',')[-1]
-                
-                # 解码base64
-                img_bytes = base64.b64decode(base64_data)
-                img_pil = Image.open(io.BytesIO(img_bytes))
-                # 转换为RGB（确保3通道）
-                if img_pil.mode != 'RGB':
-                    img_pil = img_pil.convert('RGB')
-                # 转换为numpy数组并归一化到0-1
-                img_np = np.array(img_pil).astype(np.float32) / 255.0
-                # 转换为tensor: (height, width, channels) -> (1, height, width, channels)
-                background_img_tensor = torch.from_numpy(img_np).unsqueeze(0)
-                # 只在调试时打印
-                # print(f"Loaded image from base64: {img_pil.size[0]}x{img_pil.size[1]}")
-            except Exception as e:
-                print(f"Error loading image from base64: {e}")
-                import traceback
-                traceback.print_exc()
+        if image_file and image_file.strip():
+            background_img_tensor = self._load_file_image(image_file)
+        
+        if background_img_tensor is None and image_base64 and image_base64.strip():
+            background_img_tensor = self._load_base64_image(image_base64)
         
         # 如果没有base64图片，创建默认空白图片
         if background_img_tensor is None:
@@ -59,298 +70,295 @@ class ycimagebrushmask:
         
         # 获取背景图尺寸
         # IMAGE格式: (batch, height, width, channels)
-        batch_size = background_img_tensor.shape[0]
         height = background_img_tensor.shape[1]
         width = background_img_tensor.shape[2]
         
-        # 创建空白遮罩 (batch, height, width)
-        mask = torch.zeros((batch_size, height, width), dtype=torch.float32)
+        # scaled_mask 的尺寸与缩放比例
+        scaled_width, scaled_height, scale_x, scale_y = self._scaled_size(
+            width, height, mask_scale, mask_width, mask_height
+        )
+        is_scaled = (scaled_width, scaled_height) != (width, height)
+        
+        threads = raster_threads if raster_threads > 0 else (os.cpu_count() or 1)
+        
+        mask = None
+        if full_res_mask or not is_scaled:
+            mask = self._render_mask(
+                brush_data, brush_size, width, height, width, height, 1, 1, threads, simplify_tolerance
+            )
+        scaled_mask = mask
+        if is_scaled:
+            scaled_mask = self._render_mask(
+                brush_data, brush_size, width, height, scaled_width, scaled_height, scale_x, scale_y,
+                threads, simplify_tolerance
+            )
+        if mask is None:
+            mask = scaled_mask
+        
+        # 返回遮罩、图片和尺寸
+        return (background_img_tensor, mask, width, height, scaled_mask)
+    
+    def _scaled_size(self, width, height, mask_scale, mask_width, mask_height):
+        """返回 (输出宽, 输出高, x 缩放比例, y 缩放比例)。"""
+        if mask_scale == "custom":
+            if mask_width <= 0 and mask_height <= 0:
+                return width, height, 1, 1
+            # 只给出一边时按原图宽高比推算另一边
+            if mask_width <= 0:
+                mask_width = max(1, round(width * mask_height / height))
+            if mask_height <= 0:
+                mask_height = max(1, round(height * mask_width / width))
+            return mask_width, mask_height, mask_width / width, mask_height / height
+        
+        # 固定比例与 latent 一致：尺寸向下取整，像素网格按 1/n 对齐
+        divisor = {"1/2": 2, "1/4": 4, "1/8": 8}.get(mask_scale, 1)
+        if divisor == 1:
+            return width, height, 1, 1
+        return max(1, width // divisor), max(1, height // divisor), 1 / divisor, 1 / divisor
+    
+    def _render_mask(self, brush_data, brush_size, width, height, out_width, out_height, scale_x, scale_y,
+                     threads=1, simplify_tolerance=0.0):
+        """在 out_width x out_height 的网格上绘制所有笔画，返回 (1, H, W) 遮罩。"""
+        # 笔画只写入被触及的块（TiledMask），最后一次性写进唯一的输出张量
+        tiles = None
+        cache_slot = (out_width, out_height)
         
         # 解析画笔数据并绘制到遮罩上
         if brush_data and brush_data.strip():
             try:
                 # 画笔数据格式支持多种格式：
+                # 二进制格式：b1:<base64>（见 utils/brush_codec.py）
                 # 新格式：mode:size:opacity:x1,y1;x2,y2;...
                 # 旧格式1：mode:x1,y1;x2,y2;...
                 # 旧格式2：x1,y1;x2,y2;... (多个笔画用"|"分隔)
-                strokes = brush_data.split('|')
-                total_strokes = len([s for s in strokes if s.strip()])
-                # 只在调试时打印（大图时减少日志输出）
-                # if total_strokes > 0:
-                #     print(f"Parsing brush data: {total_strokes} strokes, brush_size={brush_size}, image_size={width}x{height}")
-                
-                # 创建numpy数组用于绘制（在所有stroke之前创建一次）
-                mask_np = mask[0].numpy().copy()
+                # 增量绘制：如果本次只是在上次的 brush_data 后面追加了笔画，
+                # 从上次结果的副本开始只画新增笔画；撤销/修改等情况完整重绘
+                cache_key = (brush_size, width, height, simplify_tolerance)
+                tiles, pending_data = self._restore_stroke_cache(cache_slot, cache_key, brush_data)
                 
-                # 批量解析所有点，减少字符串操作
-                for stroke_idx, stroke in enumerate(strokes):
-                    if not stroke.strip():
+                strokes = []
+                for stroke in pending_data.split('|'):
+                    parsed = self._parse_stroke(stroke, brush_size, width, height)
+                    if parsed is None:
                         continue
-                    
-                    # 解析模式、size、opacity和颜色信息
-                    mode = 'brush'  # 默认模式
-                    stroke_size = brush_size  # 默认使用全局brush_size
-                    stroke_opacity = 1.0  # 默认透明度（后端不使用，但解析出来保持兼容）
-                    stroke_color = None  # 颜色信息（后端不使用，但解析出来保持兼容）
-                    points_str = stroke
-                    
-                    if ':' in stroke:
-                        parts = stroke.split(':')
-                        if len(parts) >= 2:
-                            # 检查第一部分是否是模式
-                            if parts[0] in ('brush', 'erase'):
-                                mode = parts[0]
-                                
-                                # 检查格式：支持 mode:size:opacity:r,g,b:points 或 mode:size:opacity:points
-                                if len(parts) >= 4:
-                                    # 尝试解析新格式（带颜色）：mode:size:opacity:r,g,b:points
-                                    part3 = parts[3]
-                                    if part3 and ',' in part3:
-                                        # 可能是颜色格式 r,g,b
-                                        try:
-                                            color_parts = part3.split(',')
-                                            if len(color_parts) == 3:
-                                                r = int(float(color_parts[0]))
-                                                g = int(float(color_parts[1]))
-                                                b = int(float(color_parts[2]))
-                                                # 验证是否是有效的RGB值
-                                                if 0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255:
-                                                    # 这是颜色，格式为 mode:size:opacity:r,g,b:points
-                                                    stroke_size = int(float(parts[1]))
-                                                    stroke_opacity = float(parts[2])
-                                                    stroke_color = f"{r},{g},{b}"
-                                                    # 合并剩余部分作为points（处理points中可能包含冒号的情况）
-                                                    points_str = ':'.join(parts[4:])
-                                                else:
-                                                    # 不是有效的颜色，可能是旧格式 mode:size:opacity:points
-                                                    stroke_size = int(float(parts[1]))
-                                                    stroke_opacity = float(parts[2])
-                                                    points_str = ':'.join(parts[3:])
-                                            else:
-                                                # 不是颜色格式，可能是旧格式 mode:size:opacity:points
-                                                stroke_size = int(float(parts[1]))
-                                                stroke_opacity = float(parts[2])
-                                                points_str = ':'.join(parts[3:])
-                                        except (ValueError, IndexError):
-                                            # 解析失败，使用旧格式
-                                            try:
-                                                stroke_size = int(float(parts[1]))
-                                                stroke_opacity = float(parts[2])
-                                                points_str = ':'.join(parts[3:])
-                                            except (ValueError, IndexError):
-                                                points_str = ':'.join(parts[1:])
-                                    else:
-                                        # 旧格式：mode:size:opacity:points（没有颜色）
-                                        try:
-                                            stroke_size = int(float(parts[1]))
-                                            stroke_opacity = float(parts[2])
-                                            # 合并剩余部分作为points（处理points中可能包含冒号的情况）
-                                            points_str = ':'.join(parts[3:])
-                                        except (ValueError, IndexError):
-                                            # 解析失败，使用默认值
-                                            points_str = ':'.join(parts[1:])
-                                else:
-                                    # 旧格式1：mode:points
-                                    points_str = ':'.join(parts[1:])
-                    
-                    # 计算该路径的半径
-                    radius = max(1, stroke_size // 2)  # 确保半径至少为1
-                    
-                    # 解析单个笔画的所有点
-                    point_list = points_str.split(';')
-                    path_points = []
-                    
-                    for point_str in point_list:
-                        if not point_str.strip():
-                            continue
-                        try:
-                            # 直接分割并转换，减少异常处理开销
-                            coords = point_str.split(',', 1)  # 只分割一次
-                            if len(coords) == 2:
-                                x = int(float(coords[0]))
-                                y = int(float(coords[1]))
-                                # 确保坐标在有效范围内
-                                if 0 <= x < width and 0 <= y < height:
-                                    path_points.append((x, y))
-                        except (ValueError, IndexError):
-                            continue
+                    mode, radius, path_points = parsed
+                    if simplify_tolerance > 0:
+                        path_points = simplify_stroke(path_points, simplify_tolerance * radius)
                     
                     # 在遮罩上绘制或擦除路径（使用该路径自己的size）
-                    if len(path_points) > 0:
-                        # 绘制每个点（圆形画笔或橡皮擦）
-                        for i, (x, y) in enumerate(path_points):
-                            # 如果是连续路径，绘制线段
-                            if i > 0:
-                                prev_x, prev_y = path_points[i-1]
-                                # 在两点之间绘制线段
-                                if mode == 'erase':
-                                    self._erase_line(mask_np, prev_x, prev_y, x, y, radius)
-                                else:
-                                    self._draw_line(mask_np, prev_x, prev_y, x, y, radius)
-                            else:
-                                # 绘制单个点（第一个点）
-                                if mode == 'erase':
-                                    self._erase_circle(mask_np, x, y, radius)
-                                else:
-                                    self._draw_circle(mask_np, x, y, radius)
+                    # 整条笔画一次性向量化光栅化，全分辨率时结果与逐点盖圆完全一致
+                    centers = stroke_centers(path_points, radius)
+                    centers, rx, ry = scale_centers(centers, radius, scale_x, scale_y)
+                    strokes.append((centers, rx, ry, mode == 'erase'))
                 
-                # 所有stroke绘制完成后，更新遮罩
-                mask[0] = torch.from_numpy(mask_np)
-                # 只在调试时打印
-                # if total_strokes > 0:
-                #     print(f"Completed drawing {total_strokes} strokes")
+                tiles.draw_strokes(strokes, threads=threads)
+                
+                # 所有stroke绘制完成后缓存分块遮罩（下次写时复制，不拷贝整图）
+                self._stroke_cache[cache_slot] = (cache_key, brush_data, tiles)
                         
             except Exception as e:
+                self._stroke_cache.pop(cache_slot, None)
                 print(f"Error parsing brush data: {e}")
                 import traceback
                 traceback.print_exc()
         
-        # 确保遮罩值在0-1范围内
-        mask = torch.clamp(mask, 0.0, 1.0)
-        
-        # 返回遮罩、图片和尺寸
-        return (background_img_tensor, mask, width, height)
+        # 创建遮罩 (batch, height, width)，块内只有 0/1，无需再 clamp
+        mask = torch.zeros((1, out_height, out_width), dtype=torch.float32)
+        if tiles is not None:
+            tiles.write_into(mask[0].numpy())
+        return mask
     
-    def _draw_circle(self, mask, x, y, radius):
-        """在遮罩上绘制圆形（优化版本，使用向量化操作）"""
-        h, w = mask.shape
-        y_min = max(0, y - radius)
-        y_max = min(h, y + radius + 1)
-        x_min = max(0, x - radius)
-        x_max = min(w, x + radius + 1)
+    def _load_base64_image(self, image_base64):
+        """解码 base64 图片为 (1, H, W, 3) float32 张量，按内容哈希缓存；失败返回 None。"""
+        # 处理可能的data URL格式（去掉前缀）
+        base64_data = image_base64.strip()
+        if ',' in base64_data:
+            # 如果包含逗号，说明是data URL格式，取逗号后的部分
+            base64_data = base64_data.split(',')[-1]
         
-        if x_max <= x_min or y_max <= y_min:
-            return
+        cache_key = hashlib.sha1(base64_data.encode('ascii', 'ignore')).hexdigest()
+        cached = _IMAGE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # 使用numpy向量化操作替代Python循环
-        # 创建坐标网格
-        y_coords, x_coords = np.ogrid[y_min:y_max, x_min:x_max]
+        try:
+            # 解码base64
+            img_bytes = base64.b64decode(base64_data)
+            img_tensor = self._pil_to_tensor(Image.open(io.BytesIO(img_bytes)))
+            # 只在调试时打印
+            # print(f"Loaded image from base64: {img_tensor.shape[2]}x{img_tensor.shape[1]}")
+        except Exception as e:
+            print(f"Error loading image from base64: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
         
-        # 计算距离（使用平方距离避免sqrt，提高性能）
-        dist_sq = (x_coords - x)**2 + (y_coords - y)**2
-        radius_sq = radius * radius
-        
-        # 一次性设置所有在圆内的点
-        mask[y_min:y_max, x_min:x_max] = np.maximum(
-            mask[y_min:y_max, x_min:x_max],
-            (dist_sq <= radius_sq).astype(np.float32)
-        )
+        _IMAGE_CACHE.put(cache_key, img_tensor, img_tensor.numel() * img_tensor.element_size())
+        return img_tensor
     
-    def _draw_line(self, mask, x1, y1, x2, y2, radius):
-        """在遮罩上绘制线段（带宽度，优化版本）"""
-        # 如果两点相同，只绘制一个圆
-        if x1 == x2 and y1 == y2:
-            self._draw_circle(mask, x1, y1, radius)
-            return
-        
-        # 计算线段长度和步数（根据半径调整步数，避免过度采样）
-        dx = x2 - x1
-        dy = y2 - y1
-        length = np.sqrt(dx*dx + dy*dy)
-        
-        # 优化：步数根据半径动态调整，避免过度采样
-        # 对于大半径，减少步数；对于小半径，增加步数以保证连续性
-        if radius > 10:
-            step_size = max(1, radius // 3)  # 大半径时步长更大
-        else:
-            step_size = 1  # 小半径时每像素一步
-        
-        steps = max(1, int(length / step_size) + 1)
-        
-        if steps <= 0:
-            self._draw_circle(mask, x1, y1, radius)
-            return
+    def _load_file_image(self, image_file):
+        """从 ComfyUI 目录中的图片文件加载，按 (路径, 修改时间, 大小) 缓存；失败返回 None。"""
+        meta = parse_image_ref(image_file)
+        path = resolve_image_path(meta) if meta else ""
+        if not path or not os.path.isfile(path):
+            print(f"[ycimagebrushmask] image file not found: {image_file}")
+            return None
         
-        # 使用numpy生成所有点，一次性绘制
-        t_values = np.linspace(0, 1, steps + 1)
-        x_coords = (x1 + dx * t_values).astype(np.int32)
-        y_coords = (y1 + dy * t_values).astype(np.int32)
+        stat = os.stat(path)
+        cache_key = ("file", path, stat.st_mtime_ns, stat.st_size)
+        cached = _IMAGE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # 去重并确保在范围内（使用numpy去重，更快）
-        h, w = mask.shape
-        valid_mask = (x_coords >= 0) & (x_coords < w) & (y_coords >= 0) & (y_coords < h)
-        x_coords = x_coords[valid_mask]
-        y_coords = y_coords[valid_mask]
+        try:
+            # 直接从文件流式解码，不经过整段读入内存/base64
+            with Image.open(path) as img_pil:
+                img_tensor = self._pil_to_tensor(img_pil)
+        except Exception as e:
+            print(f"[ycimagebrushmask] load fail {path}: {e}")
+            return None
         
-        # 去重：使用numpy的unique，避免重复绘制同一位置
-        if len(x_coords) > 0:
-            # 将坐标组合成结构化数组以便去重
-            coords = np.column_stack((y_coords, x_coords))
-            unique_coords = np.unique(coords, axis=0)
-            
-            # 批量绘制所有点（减少函数调用）
-            for y, x in unique_coords:
-                self._draw_circle(mask, int(x), int(y), radius)
+        _IMAGE_CACHE.put(cache_key, img_tensor, img_tensor.numel() * img_tensor.element_size())
+        return img_tensor
     
-    def _erase_circle(self, mask, x, y, radius):
-        """在遮罩上擦除圆形（减少遮罩值）"""
-        h, w = mask.shape
-        y_min = max(0, y - radius)
-        y_max = min(h, y + radius + 1)
-        x_min = max(0, x - radius)
-        x_max = min(w, x + radius + 1)
-        
-        if x_max <= x_min or y_max <= y_min:
-            return
-        
-        # 使用numpy向量化操作
-        y_coords, x_coords = np.ogrid[y_min:y_max, x_min:x_max]
-        
-        # 计算距离（使用平方距离避免sqrt）
-        dist_sq = (x_coords - x)**2 + (y_coords - y)**2
-        radius_sq = radius * radius
-        
-        # 擦除：将圆内的点设为0
-        erase_mask = dist_sq <= radius_sq
-        mask[y_min:y_max, x_min:x_max] = np.where(
-            erase_mask,
-            0.0,  # 擦除区域设为0
-            mask[y_min:y_max, x_min:x_max]  # 保持原值
-        )
+    def _pil_to_tensor(self, img_pil):
+        # 转换为RGB（确保3通道）
+        if img_pil.mode != 'RGB':
+            img_pil = img_pil.convert('RGB')
+        # 通过数组接口直接取 uint8 像素（不再另存一份 uint8 拷贝），
+        # 一次除法归一化到 0-1 并直接写进输出张量 (1, height, width, channels)，没有 float32 中间数组
+        img_np = np.asarray(img_pil)
+        img_tensor = torch.empty((1,) + img_np.shape, dtype=torch.float32)
+        np.divide(img_np, np.float32(255), out=img_tensor[0].numpy())
+        return img_tensor
+    
+    def _restore_stroke_cache(self, cache_slot, cache_key, brush_data):
+        """
+        返回 (起始 TiledMask, 待绘制的 brush_data)。
+        缓存命中条件：绘制参数（默认笔刷、画布尺寸、简化容差）一致，且新数据是旧数据在笔画边界（"|"）处的延长。
+        """
+        out_width, out_height = cache_slot
+        cached = self._stroke_cache.get(cache_slot)
+        if cached is not None:
+            key, cached_data, cached_tiles = cached
+            if key == cache_key and brush_data.startswith(cached_data):
+                rest = brush_data[len(cached_data):]
+                if not rest or rest.startswith('|'):
+                    return cached_tiles.copy(), rest
+        return TiledMask(out_height, out_width), brush_data
     
-    def _erase_line(self, mask, x1, y1, x2, y2, radius):
-        """在遮罩上擦除线段（带宽度，优化版本）"""
-        # 如果两点相同，只擦除一个圆
-        if x1 == x2 and y1 == y2:
-            self._erase_circle(mask, x1, y1, radius)
-            return
+    def _parse_stroke(self, stroke, brush_size, width, height):
+        """
+        解析单个笔画，返回 (mode, radius, points)；points 为画布内的 (N, 2) int32 坐标。
+        空笔画或没有有效点时返回 None。
+        """
+        if not stroke.strip():
+            return None
         
-        # 计算线段长度和步数
-        dx = x2 - x1
-        dy = y2 - y1
-        length = np.sqrt(dx*dx + dy*dy)
+        # 紧凑二进制笔画（b1:...）直接用 np.frombuffer 解码为坐标数组
+        if is_binary_stroke(stroke):
+            try:
+                mode, stroke_size, _, points = decode_binary_stroke(stroke)
+            except ValueError as e:
+                print(f"Error decoding binary stroke: {e}")
+                return None
+            inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+            points = points[inside]
+            if len(points) == 0:
+                return None
+            return mode, max(1, stroke_size // 2), points
         
-        # 优化：步数根据半径动态调整
-        if radius > 10:
-            step_size = max(1, radius // 3)
-        else:
-            step_size = 1
+        # 解析模式、size、opacity和颜色信息
+        mode = 'brush'  # 默认模式
+        stroke_size = brush_size  # 默认使用全局brush_size
+        stroke_opacity = 1.0  # 默认透明度（后端不使用，但解析出来保持兼容）
+        stroke_color = None  # 颜色信息（后端不使用，但解析出来保持兼容）
+        points_str = stroke
         
-        steps = max(1, int(length / step_size) + 1)
+        if ':' in stroke:
+            parts = stroke.split(':')
+            if len(parts) >= 2:
+                # 检查第一部分是否是模式
+                if parts[0] in ('brush', 'erase'):
+                    mode = parts[0]
+                    
+                    # 检查格式：支持 mode:size:opacity:r,g,b:points 或 mode:size:opacity:points
+                    if len(parts) >= 4:
+                        # 尝试解析新格式（带颜色）：mode:size:opacity:r,g,b:points
+                        part3 = parts[3]
+                        if part3 and ',' in part3:
+                            # 可能是颜色格式 r,g,b
+                            try:
+                                color_parts = part3.split(',')
+                                if len(color_parts) == 3:
+                                    r = int(float(color_parts[0]))
+                                    g = int(float(color_parts[1]))
+                                    b = int(float(color_parts[2]))
+                                    # 验证是否是有效的RGB值
+                                    if 0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255:
+                                        # 这是颜色，格式为 mode:size:opacity:r,g,b:points
+                                        stroke_size = int(float(parts[1]))
+                                        stroke_opacity = float(parts[2])
+                                        stroke_color = f"{r},{g},{b}"
+                                        # 合并剩余部分作为points（处理points中可能包含冒号的情况）
+                                        points_str = ':'.join(parts[4:])
+                                    else:
+                                        # 不是有效的颜色，可能是旧格式 mode:size:opacity:points
+                                        stroke_size = int(float(parts[1]))
+                                        stroke_opacity = float(parts[2])
+                                        points_str = ':'.join(parts[3:])
+                                else:
+                                    # 不是颜色格式，可能是旧格式 mode:size:opacity:points
+                                    stroke_size = int(float(parts[1]))
+                                    stroke_opacity = float(parts[2])
+                                    points_str = ':'.join(parts[3:])
+                            except (ValueError, IndexError):
+                                # 解析失败，使用旧格式
+                                try:
+                                    stroke_size = int(float(parts[1]))
+                                    stroke_opacity = float(parts[2])
+                                    points_str = ':'.join(parts[3:])
+                                except (ValueError, IndexError):
+                                    points_str = ':'.join(parts[1:])
+                        else:
+                            # 旧格式：mode:size:opacity:points（没有颜色）
+                            try:
+                                stroke_size = int(float(parts[1]))
+                                stroke_opacity = float(parts[2])
+                                # 合并剩余部分作为points（处理points中可能包含冒号的情况）
+                                points_str = ':'.join(parts[3:])
+                            except (ValueError, IndexError):
+                                # 解析失败，使用默认值
+                                points_str = ':'.join(parts[1:])
+                    else:
+                        # 旧格式1：mode:points
+                        points_str = ':'.join(parts[1:])
         
-        if steps <= 0:
-            self._erase_circle(mask, x1, y1, radius)
-            return
+        # 计算该路径的半径
+        radius = max(1, stroke_size // 2)  # 确保半径至少为1
         
-        # 使用numpy生成所有点
-        t_values = np.linspace(0, 1, steps + 1)
-        x_coords = (x1 + dx * t_values).astype(np.int32)
-        y_coords = (y1 + dy * t_values).astype(np.int32)
+        # 解析单个笔画的所有点
+        point_list = points_str.split(';')
+        path_points = []
         
-        # 去重并确保在范围内
-        h, w = mask.shape
-        valid_mask = (x_coords >= 0) & (x_coords < w) & (y_coords >= 0) & (y_coords < h)
-        x_coords = x_coords[valid_mask]
-        y_coords = y_coords[valid_mask]
+        for point_str in point_list:
+            if not point_str.strip():
+                continue
+            try:
+                # 直接分割并转换，减少异常处理开销
+                coords = point_str.split(',', 1)  # 只分割一次
+                if len(coords) == 2:
+                    x = int(float(coords[0]))
+                    y = int(float(coords[1]))
+                    # 确保坐标在有效范围内
+                    if 0 <= x < width and 0 <= y < height:
+                        path_points.append((x, y))
+            except (ValueError, IndexError):
+                continue
         
-        # 去重：使用numpy的unique
-        if len(x_coords) > 0:
-            coords = np.column_stack((y_coords, x_coords))
-            unique_coords = np.unique(coords, axis=0)
-            
-            # 批量擦除所有点
-            for y, x in unique_coords:
-                self._erase_circle(mask, int(x), int(y), radius)
+        if not path_points:
+            return None
+        return mode, radius, np.array(path_points, dtype=np.int32)
 
 # author.yichengup.Loadimage_brushmask 2025.01.XX
 
@@ -1,12 +1,27 @@
+import functools
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 import numpy as np
 import torch
 from PIL import Image
 
-import folder_paths
+from .utils.image_files import resolve_image_path
+from .utils.lru_cache import ByteLRUCache
+
+# 进程级解码缓存：键为 (路径, mtime_ns, 文件大小)，值为只读的 uint8 RGB 数组
+# 文件被覆盖后 mtime/大小变化即自动失效；上限用环境变量 YC_LIVE_IMAGES_CACHE_MB 调整（0 关闭）
+_DECODE_CACHE = ByteLRUCache(int(os.environ.get("YC_LIVE_IMAGES_CACHE_MB", "1024")) * 1024 * 1024)
+
+
+@functools.lru_cache(maxsize=4096)
+def _read_image_size(path: str, mtime_ns: int, size: int) -> Tuple[int, int]:
+    """只解析图片头得到 (宽, 高)，不解码像素；按文件标识缓存。"""
+    with Image.open(path) as img:
+        return img.size
 
 
 class YCLiveLoadImagesMulti:
@@ -25,8 +40,15 @@ class YCLiveLoadImagesMulti:
             "optional": {
                 "batch_start": ("INT", {"default": -1, "min": -1, "max": 999, "step": 1}),
                 "batch_end": ("INT", {"default": -1, "min": -1, "max": 999, "step": 1}),
-                "align_mode": (["first", "largest", "smallest"], {"default": "largest"}),
+                "align_mode": (["first", "largest", "smallest", "resize"], {"default": "largest"}),
                 "pad_color": ("STRING", {"default": "#000000"}),
+                # 解码线程数：0 = 自动（CPU 核数，最多 8），1 = 逐张顺序解码
+                "decode_threads": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1}),
+                # resize 模式：每张图等比缩放到目标尺寸内，剩余部分用 pad_color 填充
+                # 宽/高为 0 时按第一张图的比例推算；都为 0 时用 max_side 限制第一张图的长边
+                "resize_width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8}),
+                "resize_height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8}),
+                "max_side": ("INT", {"default": 1024, "min": 0, "max": 16384, "step": 8}),
             },
         }
 
@@ -36,6 +58,24 @@ class YCLiveLoadImagesMulti:
     FUNCTION = "load_images"
     OUTPUT_NODE = True
 
+    @classmethod
+    def IS_CHANGED(cls, images_json: str = "", **kwargs):
+        """
+        文件指纹：只对解析后的路径做 os.stat，取 (mtime_ns, 大小)，不读取像素。
+        文件被覆盖或删除时指纹变化，节点重新执行；文件没变时沿用 ComfyUI 的缓存结果。
+        """
+        node = cls()
+        fingerprint = hashlib.sha1()
+        for meta in node._parse_metas(images_json):
+            path = node._resolve_path(meta) if isinstance(meta, dict) else ""
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+            state = f"{stat.st_mtime_ns}:{stat.st_size}" if stat else "missing"
+            fingerprint.update(f"{path}|{state}\n".encode("utf-8", "surrogateescape"))
+        return fingerprint.hexdigest()
+
     def load_images(
         self,
         images_json: str,
@@ -44,6 +84,10 @@ class YCLiveLoadImagesMulti:
         batch_end: int = -1,
         align_mode: str = "largest",
         pad_color: str = "#000000",
+        decode_threads: int = 0,
+        resize_width: int = 0,
+        resize_height: int = 0,
+        max_side: int = 1024,
     ):
         metas = self._parse_metas(images_json)
         if not metas:
@@ -51,33 +95,41 @@ class YCLiveLoadImagesMulti:
             empty_mask = torch.ones((1, 64, 64), dtype=torch.float32)
             return empty_img, empty_mask, empty_img, empty_mask, json.dumps([])
 
-        images = []
-        for meta in metas:
-            tensor = self._load_image(meta)
-            if tensor is not None:
-                images.append(tensor)
+        # 先只读文件头拿到所有可用图片的尺寸（不解码像素），序号与对齐目标都基于这份列表
+        entries = [entry for entry in (self._probe_image(meta) for meta in metas) if entry is not None]
 
-        if not images:
+        if not entries:
             empty_img = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
             empty_mask = torch.ones((1, 64, 64), dtype=torch.float32)
             return empty_img, empty_mask, empty_img, empty_mask, json.dumps([])
 
-        batch_images, batch_masks = self._align_batch(images, align_mode, pad_color)
-
-        idx = len(batch_images) - 1 if selected_index == -1 else max(0, min(selected_index, len(batch_images) - 1))
-        single_image = batch_images[idx:idx + 1]
-        single_mask = batch_masks[idx:idx + 1]
-
+        count = len(entries)
+        idx = count - 1 if selected_index == -1 else max(0, min(selected_index, count - 1))
         if batch_start == -1:
-            out_images = single_image
-            out_masks = single_mask
+            start = end = idx
         else:
-            start = max(0, min(batch_start, len(batch_images) - 1))
-            end = len(batch_images) - 1 if batch_end == -1 else max(0, min(batch_end, len(batch_images) - 1))
+            start = max(0, min(batch_start, count - 1))
+            end = count - 1 if batch_end == -1 else max(0, min(batch_end, count - 1))
             if start > end:
                 start, end = end, start
-            out_images = batch_images[start:end + 1]
-            out_masks = batch_masks[start:end + 1]
+
+        # 只解码输出真正用到的图片：批次范围 + 单张
+        needed = sorted(set(range(start, end + 1)) | {idx})
+        sizes = [entry[2] for entry in entries]
+        if align_mode == "resize":
+            target_h, target_w = self._resize_target(sizes[0], resize_width, resize_height, max_side)
+            decode_sizes = [self._fit_size(sizes[i], target_w, target_h) for i in needed]
+        else:
+            target_h, target_w = self._target_size(sizes, align_mode)
+            decode_sizes = [None] * len(needed)
+        images = self._load_all([entries[i] for i in needed], decode_sizes, decode_threads)
+        aligned_images, aligned_masks = self._align_batch(images, target_h, target_w, pad_color)
+        slot = {index: position for position, index in enumerate(needed)}
+
+        single_image = aligned_images[slot[idx]:slot[idx] + 1]
+        single_mask = aligned_masks[slot[idx]:slot[idx] + 1]
+        out_images = aligned_images[slot[start]:slot[end] + 1]
+        out_masks = aligned_masks[slot[start]:slot[end] + 1]
 
         # 不返回 ui 预览，避免与前端即时预览重复
         return (
@@ -96,75 +148,123 @@ class YCLiveLoadImagesMulti:
             return []
 
     def _resolve_path(self, meta: dict) -> str:
-        filename = meta.get("filename") or meta.get("name")
-        subfolder = meta.get("subfolder", "")
-        ftype = meta.get("type", "input")
-        base = {
-            "temp": folder_paths.get_temp_directory,
-            "input": folder_paths.get_input_directory,
-            "output": folder_paths.get_output_directory,
-        }.get(ftype, folder_paths.get_temp_directory)()
-        return os.path.join(base, subfolder, filename)
-
-    def _load_image(self, meta: dict):
+        return resolve_image_path(meta)
+
+    def _probe_image(self, meta: dict):
+        """只读文件信息和图片头，返回 (路径, stat, (宽, 高))；文件不存在或不是图片时返回 None。"""
         path = self._resolve_path(meta)
-        if not path or not os.path.exists(path):
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
             print(f"[YCLiveLoadImagesMulti] file not found: {path}")
             return None
         try:
-            img = Image.open(path).convert("RGB")
-            arr = np.array(img).astype(np.float32) / 255.0
-            return torch.from_numpy(arr).unsqueeze(0)
+            return path, stat, _read_image_size(path, stat.st_mtime_ns, stat.st_size)
         except Exception as e:
             print(f"[YCLiveLoadImagesMulti] load fail {path}: {e}")
             return None
 
-    def _align_batch(self, images: List[torch.Tensor], mode: str, pad_color: str) -> Tuple[torch.Tensor, torch.Tensor]:
+    def _load_all(self, entries: List[tuple], decode_sizes: List[tuple], threads: int) -> List[np.ndarray]:
+        """按顺序解码 entries（失败的位置为 None）；PIL 解码时释放 GIL，多线程可以并行。"""
+        if threads <= 0:
+            threads = min(8, os.cpu_count() or 1)
+        threads = min(threads, len(entries))
+        if threads <= 1:
+            return [self._load_image(entry, size) for entry, size in zip(entries, decode_sizes)]
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return list(pool.map(self._load_image, entries, decode_sizes))
+
+    def _load_image(self, entry: tuple, decode_size: Tuple[int, int] = None):
+        """返回 (H, W, 3) uint8 数组，归一化留到 _align_batch 直接写入输出批次时再做。"""
+        path, stat, _ = entry
+        try:
+            return self._decode_cached(path, stat, decode_size)
+        except Exception as e:
+            print(f"[YCLiveLoadImagesMulti] load fail {path}: {e}")
+            return None
+
+    def _decode_cached(self, path: str, stat: os.stat_result, decode_size: Tuple[int, int] = None) -> np.ndarray:
+        """
+        解码为 uint8 RGB 数组；同一文件（路径、修改时间、大小都不变）以同一尺寸只解码一次。
+        decode_size=(宽, 高) 时缩放到该尺寸：JPEG 用 draft() 直接按 1/2、1/4、1/8 解码，
+        其他格式由 resize 的 reducing_gap 先用 reduce() 整数倍缩小，再做一次高质量缩放。
+        """
+        cache_key = (path, stat.st_mtime_ns, stat.st_size, decode_size)
+        arr = _DECODE_CACHE.get(cache_key)
+        if arr is None:
+            with Image.open(path) as img:
+                if decode_size is not None and decode_size != img.size:
+                    img.draft("RGB", decode_size)
+                    if img.mode != "RGB":
+                        img = img.convert("RGB")
+                    img = img.resize(decode_size, Image.LANCZOS, reducing_gap=3.0)
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                # 数组接口直接包装 PIL 导出的像素缓冲区，不再额外拷贝
+                arr = np.asarray(img)
+            if arr.flags.writeable:
+                arr.flags.writeable = False
+            _DECODE_CACHE.put(cache_key, arr, arr.nbytes)
+        return arr
+
+    def _target_size(self, sizes: List[Tuple[int, int]], mode: str) -> Tuple[int, int]:
+        """根据所有图片的 (宽, 高) 计算对齐目标 (高, 宽)。"""
         if mode == "first":
-            target_h, target_w = images[0].shape[1], images[0].shape[2]
-        elif mode == "smallest":
-            target_h = min(img.shape[1] for img in images)
-            target_w = min(img.shape[2] for img in images)
-        else:
-            target_h = max(img.shape[1] for img in images)
-            target_w = max(img.shape[2] for img in images)
+            return sizes[0][1], sizes[0][0]
+        if mode == "smallest":
+            return min(h for _, h in sizes), min(w for w, _ in sizes)
+        return max(h for _, h in sizes), max(w for w, _ in sizes)
+
+    def _resize_target(self, first_size: Tuple[int, int], width: int, height: int, max_side: int) -> Tuple[int, int]:
+        """resize 模式的目标 (高, 宽)：缺的一边按第一张图的比例推算。"""
+        first_w, first_h = first_size
+        if width <= 0 and height <= 0:
+            scale = min(1.0, max_side / max(first_w, first_h)) if max_side > 0 else 1.0
+            return max(1, round(first_h * scale)), max(1, round(first_w * scale))
+        if width <= 0:
+            width = max(1, round(first_w * height / first_h))
+        elif height <= 0:
+            height = max(1, round(first_h * width / first_w))
+        return height, width
 
-        aligned_imgs = []
-        aligned_masks = []
+    def _fit_size(self, size: Tuple[int, int], target_w: int, target_h: int) -> Tuple[int, int]:
+        """等比缩放到目标尺寸内的 (宽, 高)。"""
+        w, h = size
+        scale = min(target_w / w, target_h / h)
+        return min(target_w, max(1, round(w * scale))), min(target_h, max(1, round(h * scale)))
+
+    def _align_batch(
+        self, images: List[np.ndarray], target_h: int, target_w: int, pad_color: str
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        一次分配 (N, H, W, 3) 图片和 (N, H, W) 遮罩，先填充底色，再把每张 uint8 图居中复制（或居中裁剪）进自己的槽位，
+        复制时顺便除以 255，不产生 float32 中间数组。高、宽分别判断：某个方向比目标大就裁剪，比目标小就填充。
+        """
         color = self._hex_to_gray(pad_color)
-        for img in images:
-            aligned, mask = self._align_image(img, target_h, target_w, color)
-            aligned_imgs.append(aligned)
-            aligned_masks.append(mask)
-
-        return torch.cat(aligned_imgs, dim=0), torch.cat(aligned_masks, dim=0)
-
-    def _align_image(self, image: torch.Tensor, target_h: int, target_w: int, color: float):
-        h, w = image.shape[1], image.shape[2]
-        if h == target_h and w == target_w:
-            return image, torch.ones((1, target_h, target_w), dtype=torch.float32)
-
-        pad_top = max(0, (target_h - h) // 2)
-        pad_bottom = max(0, target_h - h - pad_top)
-        pad_left = max(0, (target_w - w) // 2)
-        pad_right = max(0, target_w - w - pad_left)
-
-        if pad_top > 0 or pad_bottom > 0 or pad_left > 0 or pad_right > 0:
-            padded = torch.nn.functional.pad(
-                image,
-                (0, 0, pad_left, pad_right, pad_top, pad_bottom),
-                mode="constant",
-                value=color,
+        batch = torch.full((len(images), target_h, target_w, 3), color, dtype=torch.float32)
+        masks = torch.zeros((len(images), target_h, target_w), dtype=torch.float32)
+        batch_np = batch.numpy()
+        for i, img in enumerate(images):
+            if img is None:
+                # 文件头可读但解码失败：保留填充色，遮罩为 0，保持序号不变
+                continue
+            src_y, dst_y, rows = self._center_span(img.shape[0], target_h)
+            src_x, dst_x, cols = self._center_span(img.shape[1], target_w)
+            np.divide(
+                img[src_y:src_y + rows, src_x:src_x + cols],
+                np.float32(255),
+                out=batch_np[i, dst_y:dst_y + rows, dst_x:dst_x + cols],
             )
-            mask = torch.zeros((1, target_h, target_w), dtype=torch.float32)
-            mask[0, pad_top:pad_top + h, pad_left:pad_left + w] = 1.0
-            return padded, mask
-
-        crop_top = (h - target_h) // 2
-        crop_left = (w - target_w) // 2
-        cropped = image[:, crop_top:crop_top + target_h, crop_left:crop_left + target_w, :]
-        mask = torch.ones((1, target_h, target_w), dtype=torch.float32)
-        return cropped, mask
+            masks[i, dst_y:dst_y + rows, dst_x:dst_x + cols] = 1.0
+        return batch, masks
+
+    def _center_span(self, size: int, target: int) -> Tuple[int, int, int]:
+        """单个方向的居中对齐：返回 (源起点, 目标起点, 长度)。"""
+        if size >= target:
+            return (size - target) // 2, 0, target
+        return 0, (target - size) // 2, size
 
     def _hex_to_gray(self, hex_color: str) -> float:
         try:
@@ -0,0 +1 @@
+# 节点共用的工具模块（不注册节点，__init__.py 只加载 py 目录下的 .py 文件）
@@ -0,0 +1,189 @@
+import functools
+import math
+
+import numpy as np
+import torch
+
+# 在节点之间传递的区域集合类型：只有矩形坐标和画布尺寸，不含像素数据
+BBOXES_TYPE = "YC_BBOXES"
+# 整数标签图类型：像素值 = 区域序号 + 1，0 为背景
+LABEL_MAP_TYPE = "YC_LABEL_MAP"
+LABEL_OVERLAP_POLICIES = ("last", "first")
+# BBox Bridge 的目标坐标格式：withanyone 为归一化 x1,y1,x2,y2（原有输出），coco 为像素 x,y,w,h
+BBOX_FORMATS = ("withanyone", "normalized_cxcywh", "pixel_xyxy", "coco")
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_bbox_string_cached(data: str):
+    boxes = []
+    errors = []
+    for index, part in enumerate(data.split(';')):
+        if not part.strip():
+            continue
+        coords = part.split(',')
+        try:
+            if len(coords) != 4:
+                raise ValueError(f"expected 4 values, got {len(coords)}")
+            boxes.append([int(c) for c in coords])
+        except ValueError as e:
+            errors.append((index, part.strip(), str(e)))
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    # 缓存里的数组被多个节点共享，设为只读防止被就地修改
+    boxes.flags.writeable = False
+    return boxes, tuple(errors)
+
+
+def parse_bbox_string(data: str, report=True):
+    """
+    解析 Canvas BBox 格式 "x1,y1,w1,h1;x2,y2,w2,h2;..."，返回只读的 (N, 4) int64 数组。
+    结果按原始字符串做 LRU 缓存，同一字符串只解析一次；
+    格式错误的片段单独跳过并打印（report=True），不影响其余的框。
+    """
+    boxes, errors = _parse_bbox_string_cached(data or "")
+    if report:
+        for index, part, message in errors:
+            print(f"Skipping malformed bbox #{index} '{part}': {message}")
+    return boxes
+
+
+def convert_boxes(boxes, width, height, target_format="withanyone"):
+    """
+    把 (N, 4) x,y,w,h 像素坐标一次性转换为 target_format，返回 (N, 4) float64。
+    先转成 x1,y1,x2,y2 并裁剪到画布（归一化格式裁剪到 0-1），再换算目标格式。
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    xyxy = np.concatenate((boxes[:, :2], boxes[:, :2] + boxes[:, 2:]), axis=1)
+    size = np.array([width, height, width, height], dtype=np.float64)
+    if target_format in ("withanyone", "normalized_cxcywh"):
+        xyxy = np.clip(xyxy / size, 0.0, 1.0)
+    else:
+        xyxy = np.clip(xyxy, 0.0, size)
+
+    if target_format == "normalized_cxcywh":
+        return np.concatenate(((xyxy[:, :2] + xyxy[:, 2:]) / 2, xyxy[:, 2:] - xyxy[:, :2]), axis=1)
+    if target_format == "coco":
+        return np.concatenate((xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]), axis=1)
+    return xyxy
+
+
+def format_boxes(values, target_format="withanyone"):
+    """convert_boxes 的结果格式化为每个框一个字符串：归一化坐标保留 4 位小数，像素坐标为整数。"""
+    if target_format in ("pixel_xyxy", "coco"):
+        return [",".join(str(int(v)) for v in row) for row in values]
+    return [",".join(f"{v:.4f}" for v in row) for row in values]
+
+
+def rect_profiles(starts, ends, length, feather=0.0):
+    """
+    每个矩形在一个坐标轴上的覆盖曲线 (N, length)。
+    feather <= 0 时为 0/1 区间；否则为区间与高斯核（sigma = feather 像素）的一维卷积，
+    用 erf 解析计算，与对硬边遮罩做高斯模糊的结果相同，每个区域只需 O(length)。
+    """
+    starts = torch.as_tensor(starts, dtype=torch.float64)[:, None]
+    ends = torch.as_tensor(ends, dtype=torch.float64)[:, None]
+    if feather <= 0:
+        coords = torch.arange(length, dtype=torch.float64)
+        return ((coords >= starts) & (coords < ends)).to(torch.float32)
+    centers = torch.arange(length, dtype=torch.float64) + 0.5
+    scale = 1.0 / (feather * math.sqrt(2.0))
+    profile = 0.5 * (torch.erf((centers - starts) * scale) - torch.erf((centers - ends) * scale))
+    return profile.to(torch.float32)
+
+
+def fill_rect_masks(xyxy, out, feather=0.0):
+    """
+    把矩形 (N, 4) [x1, y1, x2, y2] 写进预分配的 (N, H, W) float32 张量 out：
+    矩形（以及高斯羽化后的矩形）可分离，行/列覆盖曲线的外积即遮罩。
+    """
+    _, height, width = out.shape
+    boxes = np.asarray(xyxy, dtype=np.int64).reshape(-1, 4)
+    rows = rect_profiles(boxes[:, 1], boxes[:, 3], height, feather)
+    cols = rect_profiles(boxes[:, 0], boxes[:, 2], width, feather)
+    torch.mul(rows[:, :, None], cols[:, None, :], out=out)
+    return out
+
+
+class BBoxSet:
+    """
+    画布上任意数量的矩形区域（x, y, width, height）与画布尺寸。
+    只有需要时才用 to_masks 生成遮罩，只用坐标的下游节点不会分配 HxW 张量。
+    """
+
+    def __init__(self, canvas_width, canvas_height, boxes):
+        self.canvas_width = int(canvas_width)
+        self.canvas_height = int(canvas_height)
+        self.boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+
+    @classmethod
+    def from_string(cls, data, canvas_width, canvas_height):
+        return cls(canvas_width, canvas_height, parse_bbox_string(data))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __repr__(self):
+        return f"BBoxSet({len(self)} boxes, {self.canvas_width}x{self.canvas_height})"
+
+    def box_string(self, index):
+        """单个区域的 "x,y,width,height" 字符串（Canvas BBox 原有输出格式）。"""
+        return ",".join(str(int(v)) for v in self.boxes[index])
+
+    def to_string(self):
+        return ";".join(self.box_string(i) for i in range(len(self)))
+
+    def xyxy(self):
+        """(N, 4) [x1, y1, x2, y2]，裁剪到画布范围内。"""
+        xyxy = np.concatenate((self.boxes[:, :2], self.boxes[:, :2] + self.boxes[:, 2:]), axis=1)
+        np.clip(xyxy[:, 0::2], 0, self.canvas_width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, self.canvas_height, out=xyxy[:, 1::2])
+        return xyxy
+
+    def to_label_map(self, overlap="last"):
+        """
+        生成整数标签图。区域重叠时 overlap="last" 后面的区域覆盖前面的（与画布上的绘制顺序一致），
+        "first" 保留先出现的区域。区域不超过 255 个时用 uint8，不超过 32767 个时用 int16，否则 int32。
+        """
+        if len(self) <= 255:
+            dtype = torch.uint8
+        elif len(self) <= 32767:
+            dtype = torch.int16
+        else:
+            dtype = torch.int32
+        labels = torch.zeros((self.canvas_height, self.canvas_width), dtype=dtype)
+        order = range(len(self)) if overlap == "last" else reversed(range(len(self)))
+        xyxy = self.xyxy()
+        for i in order:
+            x1, y1, x2, y2 = (int(v) for v in xyxy[i])
+            if x2 > x1 and y2 > y1:
+                labels[y1:y2, x1:x2] = i + 1
+        return LabelMap(labels, len(self))
+
+    def to_masks(self, start=0, count=None, feather=0.0):
+        """
+        生成第 start 个起的 count 个区域的遮罩 (n, H, W)；count 为 None 时到末尾。
+        feather > 0 时为高斯羽化的软边遮罩（sigma = feather 像素，画布外视为 0）。
+        """
+        stop = len(self) if count is None else min(len(self), start + count)
+        xyxy = self.xyxy()[start:stop]
+        out = torch.zeros((len(xyxy), self.canvas_height, self.canvas_width), dtype=torch.float32)
+        if len(xyxy):
+            fill_rect_masks(xyxy, out, feather)
+        return out
+
+
+class LabelMap:
+    """整数标签图 (H, W) 和区域数量；需要时再用 to_masks 拆成单独遮罩。"""
+
+    def __init__(self, labels, count):
+        self.labels = labels
+        self.count = int(count)
+
+    def __repr__(self):
+        height, width = self.labels.shape
+        return f"LabelMap({self.count} regions, {width}x{height}, {self.labels.dtype})"
+
+    def to_masks(self, start=0, count=None):
+        """第 start 个起的 count 个区域的遮罩 (n, H, W)，一次广播比较生成。"""
+        stop = self.count if count is None else min(self.count, start + count)
+        ids = torch.arange(start + 1, max(start, stop) + 1, dtype=self.labels.dtype)
+        return torch.eq(self.labels[None], ids[:, None, None]).to(torch.float32)
@@ -0,0 +1,238 @@
+import numpy as np
+
+# 框数乘积超过该值时改用均匀网格只计算可能相交的框对，避免 N x M 的稠密计算
+GRID_MIN_PAIRS = 65536
+# 网格中单个框最多登记的格子数，覆盖更多格子的大框改为直接与所有框比较
+GRID_MAX_CELLS_PER_BOX = 64
+# 稠密 IoU 矩阵只在框对数量不超过该值时生成，更大时只输出超过阈值的框对
+DENSE_IOU_MAX_PAIRS = 4096
+
+
+def box_areas(xyxy):
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    return np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+
+def iou_pairs(a, b, rows, cols):
+    """只计算指定框对 (a[rows[k]], b[cols[k]]) 的 IoU，返回一维数组。"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)[rows]
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)[cols]
+    iw = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+    ih = np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    inter = iw * ih
+    union = box_areas(a) + box_areas(b) - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _candidate_pairs(a, b):
+    """可能相交的 (a 索引, b 索引) 框对：框数较多时用网格筛选，否则为全部框对。"""
+    if len(a) * len(b) > GRID_MIN_PAIRS:
+        return GridIndex(b).candidate_pairs(a)
+    rows, cols = (idx.ravel() for idx in np.indices((len(a), len(b))))
+    return rows, cols
+
+
+def iou_pairs_above(a, b, threshold=0.0):
+    """
+    稀疏 IoU：返回 (rows, cols, iou) 三个一维数组，只包含 IoU 大于 threshold 的框对，
+    按 (rows, cols) 排序。内存只与候选框对数量有关，不分配 N x M 矩阵。
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty.copy(), np.zeros(0, dtype=np.float64)
+    rows, cols = _candidate_pairs(a, b)
+    iou = iou_pairs(a, b, rows, cols)
+    above = iou > threshold
+    rows, cols, iou = rows[above], cols[above], iou[above]
+    sort = np.lexsort((cols, rows))
+    return rows[sort], cols[sort], iou[sort]
+
+
+def iou_matrix(a, b):
+    """
+    (N, 4) 与 (M, 4) x1,y1,x2,y2 框的稠密 IoU 矩阵 (N, M)，只用于少量框；
+    N x M 超过 DENSE_IOU_MAX_PAIRS 时抛出 ValueError，请改用 iou_pairs_above。
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    if len(a) * len(b) > DENSE_IOU_MAX_PAIRS:
+        raise ValueError(f"dense IoU matrix too large: {len(a)} x {len(b)}")
+    out = np.zeros((len(a), len(b)), dtype=np.float64)
+    rows, cols, iou = iou_pairs_above(a, b)
+    out[rows, cols] = iou
+    return out
+
+
+def containment_pairs(a, b):
+    """返回 (i, j) 数组：b[j] 完全落在 a[i] 内部（面积为 0 的框不计）。"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    rows, cols = _candidate_pairs(a, b)
+    inner, outer = b[cols], a[rows]
+    contained = (
+        (inner[:, 0] >= outer[:, 0]) & (inner[:, 1] >= outer[:, 1])
+        & (inner[:, 2] <= outer[:, 2]) & (inner[:, 3] <= outer[:, 3])
+        & (box_areas(inner) > 0)
+    )
+    pairs = np.stack((rows[contained], cols[contained]), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def nearest_boxes(a, b, exclude_same_index=False, chunk=256):
+    """
+    每个 a[i] 的中心点最近的 b[j]，返回 (索引 (N,), 距离 (N,))；b 为空时索引为 -1。
+    exclude_same_index=True 用于同一组框内查询（不和自己比较）。
+    按块用 |ca|^2 + |cb|^2 - 2 ca·cb 计算平方距离，不生成 (chunk, M, 2) 的临时数组，内存约 chunk x M。
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    index = np.full(len(a), -1, dtype=np.int64)
+    distance = np.full(len(a), np.inf)
+    if len(b) == 0:
+        return index, distance
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    norm_b = (cb * cb).sum(axis=1)
+    for start in range(0, len(a), chunk):
+        stop = min(len(a), start + chunk)
+        d2 = ca[start:stop] @ cb.T
+        d2 *= -2
+        d2 += norm_b
+        d2 += (ca[start:stop] * ca[start:stop]).sum(axis=1)[:, None]
+        if exclude_same_index:
+            own = np.arange(start, stop)
+            valid = own < len(b)
+            d2[np.nonzero(valid)[0], own[valid]] = np.inf
+        best = np.argmin(d2, axis=1)
+        found = np.isfinite(d2[np.arange(stop - start), best])
+        index[start:stop][found] = best[found]
+        # 距离按最近框的坐标直接重算，避免展开式的舍入误差
+        offset = ca[start:stop] - cb[best]
+        distance[start:stop][found] = np.sqrt((offset[found] ** 2).sum(axis=1))
+    return index, distance
+
+
+def nms(xyxy, threshold=0.5, order=None):
+    """
+    贪心 NMS：按 order（默认输入顺序）依次保留框，并抑制与已保留框 IoU 大于 threshold 的框。
+    只对 IoU 超过阈值的框对建立邻接表（框多时用网格筛选候选），返回保留框的原始索引（按 order 顺序）。
+    """
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    n = len(xyxy)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if order is None:
+        order = np.arange(n)
+
+    rows, cols, _ = iou_pairs_above(xyxy, xyxy, threshold)
+    distinct = rows != cols
+    rows, cols = rows[distinct], cols[distinct]
+
+    # 邻接表（CSR）：neighbours[starts[i]:starts[i + 1]] 为与 i 重叠超过阈值的框
+    sort = np.argsort(rows, kind="stable")
+    neighbours = cols[sort]
+    starts = np.searchsorted(rows[sort], np.arange(n + 1))
+
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed[neighbours[starts[i]:starts[i + 1]]] = True
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _touching_pairs(a, b, chunk_pairs=1 << 22):
+    """(i, j) 两个数组：a[i] 与 b[j] 相交或边界相接。按 b 分块，临时数组不超过 chunk_pairs 个元素。"""
+    rows, cols = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    step = max(1, chunk_pairs // max(1, len(a)))
+    for start in range(0, len(b), step):
+        part = b[start:start + step]
+        touching = (
+            (a[:, None, 0] <= part[None, :, 2]) & (part[None, :, 0] <= a[:, None, 2])
+            & (a[:, None, 1] <= part[None, :, 3]) & (part[None, :, 1] <= a[:, None, 3])
+        )
+        i, j = np.nonzero(touching)
+        rows.append(i)
+        cols.append(j + start)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+class GridIndex:
+    """
+    均匀网格空间索引：每个框登记到它覆盖的所有格子，查询时只返回共享格子的框对。
+    cell_size 缺省取框边长的中位数，使每个框平均只落在少数几个格子里。
+    覆盖超过 GRID_MAX_CELLS_PER_BOX 个格子的大框（例如全画幅区域）不登记，直接与所有框逐一比较，
+    避免少数大框把索引撑到 O(画布面积 / 格子面积)。
+    """
+
+    def __init__(self, xyxy, cell_size=None):
+        self.boxes = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        if cell_size is None:
+            sides = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+            cell_size = float(np.median(sides)) if len(sides) else 1.0
+        self.cell_size = max(1.0, cell_size)
+        self.origin = self.boxes[:, :2].min(axis=0) if len(self.boxes) else np.zeros(2)
+        self.columns = 1
+        self.rows = 1
+        if len(self.boxes):
+            self.columns = int((self.boxes[:, 2].max() - self.origin[0]) // self.cell_size) + 1
+            self.rows = int((self.boxes[:, 3].max() - self.origin[1]) // self.cell_size) + 1
+        self.oversize = np.flatnonzero(self._cell_counts(self.boxes) > GRID_MAX_CELLS_PER_BOX)
+        registered = np.setdiff1d(np.arange(len(self.boxes)), self.oversize)
+        cells, ids = self._cells(self.boxes[registered])
+        sort = np.argsort(cells, kind="stable")
+        self._cells_sorted = cells[sort]
+        self._ids_sorted = registered[ids[sort]]
+
+    def _cell_range(self, xyxy):
+        """每个框覆盖的格子范围 (lo, span_x, span_y)；超出网格范围的部分裁剪掉。"""
+        lo = np.floor((xyxy[:, :2] - self.origin) / self.cell_size).astype(np.int64)
+        hi = np.floor((xyxy[:, 2:] - self.origin) / self.cell_size).astype(np.int64)
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, [self.columns - 1, self.rows - 1])
+        span_x = np.clip(hi[:, 0] - lo[:, 0] + 1, 0, None)
+        span_y = np.clip(hi[:, 1] - lo[:, 1] + 1, 0, None)
+        return lo, span_x, span_y
+
+    def _cell_counts(self, xyxy):
+        _, span_x, span_y = self._cell_range(xyxy)
+        return span_x * span_y
+
+    def _cells(self, xyxy):
+        """展开为 (格子编号, 框索引) 对。"""
+        if len(xyxy) == 0 or len(self.boxes) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        lo, span_x, span_y = self._cell_range(xyxy)
+        counts = span_x * span_y
+        ids = np.repeat(np.arange(len(xyxy)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = lo[ids, 0] + offsets % np.maximum(span_x[ids], 1)
+        cy = lo[ids, 1] + offsets // np.maximum(span_x[ids], 1)
+        return cy * self.columns + cx, ids
+
+    def candidate_pairs(self, queries):
+        """返回 (查询框索引, 索引框索引) 两个数组：至少共享一个格子或互相接触的所有框对（去重）。"""
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 4)
+        large = self._cell_counts(queries) > GRID_MAX_CELLS_PER_BOX
+        small = np.flatnonzero(~large)
+        cells, ids = self._cells(queries[small])
+        lo = np.searchsorted(self._cells_sorted, cells, side="left")
+        hi = np.searchsorted(self._cells_sorted, cells, side="right")
+        counts = hi - lo
+        rows = small[np.repeat(ids, counts)]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cols = self._ids_sorted[np.repeat(lo, counts) + offsets]
+
+        # 大框不在网格里：用坐标直接判断是否接触（与共享格子一样包含边界相接的框对）
+        to_big_rows, to_big_cols = _touching_pairs(queries, self.boxes[self.oversize])
+        from_big_cols, from_big_rows = _touching_pairs(self.boxes, queries[large])
+        rows = np.concatenate((rows, to_big_rows, np.flatnonzero(large)[from_big_rows]))
+        cols = np.concatenate((cols, self.oversize[to_big_cols], from_big_cols))
+        pairs = np.unique(rows * len(self.boxes) + cols)
+        return pairs // len(self.boxes), pairs % len(self.boxes)
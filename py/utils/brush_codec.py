@@ -0,0 +1,49 @@
+import base64
+import struct
+
+import numpy as np
+
+# 紧凑二进制笔画编码（版本 1），与文本笔画一样用 "|" 分隔，可以和旧格式混用：
+#   b1:<base64>
+# base64 解码后为小端字节序：
+#   header  <BBHfI  mode(0=brush, 1=erase), flags(保留), size, opacity, 点数 N
+#   points  N 对 int16 (x, y)：第一对为绝对坐标，其余为相对上一点的增量
+# 坐标与文本格式一样是截断后的整数像素坐标。
+
+BINARY_STROKE_PREFIX = "b1:"
+
+_HEADER = struct.Struct("<BBHfI")
+_MODES = ("brush", "erase")
+
+
+def is_binary_stroke(stroke: str) -> bool:
+    return stroke.startswith(BINARY_STROKE_PREFIX)
+
+
+def decode_binary_stroke(stroke: str):
+    """
+    解码一条 b1 笔画，返回 (mode, size, opacity, points)；points 为 (N, 2) int32 数组。
+    数据不完整时抛出 ValueError。
+    """
+    raw = base64.b64decode(stroke[len(BINARY_STROKE_PREFIX):].strip())
+    if len(raw) < _HEADER.size:
+        raise ValueError("binary stroke header truncated")
+
+    mode_id, _flags, size, opacity, count = _HEADER.unpack_from(raw)
+    if mode_id >= len(_MODES):
+        raise ValueError(f"unknown binary stroke mode: {mode_id}")
+    if len(raw) < _HEADER.size + count * 4:
+        raise ValueError("binary stroke points truncated")
+
+    deltas = np.frombuffer(raw, dtype="<i2", count=count * 2, offset=_HEADER.size).reshape(-1, 2)
+    points = np.cumsum(deltas, axis=0, dtype=np.int32)
+    return _MODES[mode_id], size, opacity, points
+
+
+def encode_binary_stroke(mode: str, size: int, opacity: float, points) -> str:
+    """编码为 b1 笔画字符串（前端 syncBrushDataWidget 的 Python 对照实现，供脚本/测试生成数据）。"""
+    points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int32))
+    header = _HEADER.pack(_MODES.index(mode), 0, int(size), float(opacity), len(points))
+    payload = header + deltas.astype("<i2").tobytes()
+    return BINARY_STROKE_PREFIX + base64.b64encode(payload).decode("ascii")
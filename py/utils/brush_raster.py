@@ -0,0 +1,301 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 画笔笔画光栅化：
+# 原实现沿线段采样圆心，再逐个圆心调用 np.ogrid 盖章，长笔画+大笔刷时 Python 循环次数巨大。
+# 这里保持完全相同的圆心采样（保证像素级一致），但把整条笔画的所有圆转换成
+# “逐行覆盖区间”，合并后用一次差分+cumsum 按块填充到 TiledMask 中。
+
+_MIN_SCALED_RADIUS = 0.7072
+# stroke_spans 每次最多展开的 (圆心, 行) 数量；长笔画按圆心分块，峰值内存与笔画长度无关
+_SPAN_BLOCK_ROWS = 1 << 18
+
+
+def stroke_centers(points, radius):
+    """
+    复现原 _draw_line 的圆心采样，返回整条笔画去重后的圆心 (N, 2) int32 数组（x, y）。
+
+    参数:
+        points: (N, 2) 整数坐标数组，已保证在画布范围内
+        radius: 笔刷半径（像素）
+    """
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    if len(points) < 2:
+        return points.astype(np.int32)
+
+    starts = points[:-1]
+    deltas = points[1:] - starts
+
+    # 步长与原实现一致：大半径时步长更大，小半径时每像素一步
+    step_size = max(1, radius // 3) if radius > 10 else 1
+    lengths = np.sqrt((deltas * deltas).sum(axis=1).astype(np.float64))
+    steps = np.maximum(1, (lengths / step_size).astype(np.int64) + 1)
+    # 两点重合时原实现只画一个圆
+    steps[(deltas == 0).all(axis=1)] = 0
+
+    # 所有线段的 t 值一次性生成，等价于逐段 np.linspace(0, 1, steps + 1)
+    counts = steps + 1
+    seg = np.repeat(np.arange(len(steps)), counts)
+    offsets = np.cumsum(counts) - counts
+    k = np.arange(counts.sum()) - offsets[seg]
+    seg_steps = steps[seg]
+    t = k * (1.0 / np.maximum(seg_steps, 1))
+    t[k == seg_steps] = 1.0
+
+    xs = (starts[seg, 0] + deltas[seg, 0] * t).astype(np.int32)
+    ys = (starts[seg, 1] + deltas[seg, 1] * t).astype(np.int32)
+
+    centers = np.concatenate([points[:1].astype(np.int32), np.stack([xs, ys], axis=1)])
+    # 同一圆心只需覆盖一次（并集运算与顺序无关）
+    keys = np.unique(centers[:, 1].astype(np.int64) << 32 | centers[:, 0].astype(np.int64))
+    return np.stack([keys & 0xFFFFFFFF, keys >> 32], axis=1).astype(np.int32)
+
+
+def simplify_stroke(points, tolerance):
+    """
+    笔画简化：先去掉连续重复点，再用 Ramer–Douglas–Peucker 删除折线上的冗余点。
+    使用点到线段（而非直线）的距离，保证每个被删除的点到简化后折线的距离不超过 tolerance 像素。
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    if len(points) > 1:
+        moved = np.any(points[1:] != points[:-1], axis=1)
+        points = points[np.concatenate(([True], moved))]
+    n = len(points)
+    if tolerance <= 0 or n < 3:
+        return points
+
+    pts = points.astype(np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        a, d = pts[i], pts[j] - pts[i]
+        rel = pts[i + 1:j] - a
+        length_sq = float(d @ d)
+        t = np.clip(rel @ d / length_sq, 0.0, 1.0) if length_sq > 0 else np.zeros(len(rel))
+        dist_sq = ((rel - t[:, None] * d) ** 2).sum(axis=1)
+        k = int(np.argmax(dist_sq))
+        if dist_sq[k] > tolerance * tolerance:
+            mid = i + 1 + k
+            keep[mid] = True
+            stack.append((i, mid))
+            stack.append((mid, j))
+    return points[keep]
+
+
+def stroke_spans(centers, rx, ry, height, width):
+    """
+    把一组同尺寸的圆/椭圆转换为合并后的逐行覆盖区间。
+
+    像素 (px, py) 被圆心 (cx, cy) 覆盖当且仅当 ((px-cx)/rx)^2 + ((py-cy)/ry)^2 <= 1，
+    即第 py 行的 [ceil(cx-hw), floor(cx+hw)]，hw^2 = rx^2 - dy^2 * (rx/ry)^2。
+    圆心与半径都是整数且 rx == ry 时与 (px-cx)^2 + (py-cy)^2 <= r^2 的逐点判断完全一致；
+    缩放绘制时圆心/半径为浮点数（见 scale_centers）。
+
+    返回:
+        (rows, starts, ends) 三个 int64 数组，按行排序，区间闭合且互不相邻
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if len(centers) == 0:
+        return empty, empty, empty
+
+    cx = centers[:, 0].astype(np.float64)[:, None]
+    cy = centers[:, 1].astype(np.float64)[:, None]
+    reach_y = int(np.ceil(ry)) + 1
+    ks = np.arange(-reach_y, reach_y + 1, dtype=np.int64)
+
+    rows = np.floor(cy).astype(np.int64) + ks[None, :]
+    dy = rows - cy
+    hw_sq = rx * rx - dy * dy * ((rx / ry) ** 2)
+    hw = np.sqrt(np.maximum(hw_sq, 0.0))
+    starts = np.maximum(np.ceil(cx - hw).astype(np.int64), 0)
+    ends = np.minimum(np.floor(cx + hw).astype(np.int64), width - 1)
+
+    valid = (hw_sq >= 0) & (rows >= 0) & (rows < height) & (starts <= ends)
+    rows, starts, ends = rows[valid], starts[valid], ends[valid]
+    if len(rows) == 0:
+        return empty, empty, empty
+
+    # 按 (行, 起点) 排序后合并重叠/相邻区间：
+    # 行内 end 的前缀最大值用 row * stride + end 的累计最大值求得（前面行的键总是更小）
+    stride = width + 2
+    order = np.argsort(rows * stride + starts, kind="stable")
+    rows, starts, ends = rows[order], starts[order], ends[order]
+    reach = np.maximum.accumulate(rows * stride + ends)
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (rows[1:] != rows[:-1]) | (starts[1:] > reach[:-1] - rows[:-1] * stride + 1)
+
+    # 每段合并区间的终点 = 该段最后一个元素处的行内前缀最大值
+    firsts = np.flatnonzero(new_run)
+    lasts = np.append(firsts[1:] - 1, len(rows) - 1)
+    return rows[firsts], starts[firsts], reach[lasts] - rows[lasts] * stride
+
+
+def stroke_span_blocks(centers, rx, ry, height, width):
+    """
+    按圆心分块生成 stroke_spans，每块展开的 (圆心, 行) 不超过 _SPAN_BLOCK_ROWS。
+    覆盖是并集，逐块应用（绘制或擦除）与整条笔画一次应用的结果完全相同。
+    """
+    for block in center_blocks(centers, ry):
+        yield stroke_spans(block, rx, ry, height, width)
+
+
+def center_blocks(centers, ry, max_rows=_SPAN_BLOCK_ROWS):
+    """把圆心切成 stroke_spans 展开后不超过 max_rows 行的若干块（视图，不拷贝）。"""
+    block = max(1, max_rows // _rows_per_center(ry))
+    for start in range(0, len(centers), block):
+        yield centers[start:start + block]
+
+
+def _rows_per_center(ry):
+    return 2 * (int(np.ceil(ry)) + 1) + 1
+
+
+def scale_centers(centers, radius, scale_x, scale_y):
+    """
+    把全分辨率下的圆心/半径映射到缩放后的像素网格（像素中心对齐），返回 (centers, rx, ry)。
+    缩小后的半径不小于 √2/2，保证任意位置的笔画至少覆盖最近的像素。
+    """
+    if scale_x == 1 and scale_y == 1:
+        return centers, radius, radius
+    scaled = np.empty(centers.shape, dtype=np.float64)
+    scaled[:, 0] = (centers[:, 0] + 0.5) * scale_x - 0.5
+    scaled[:, 1] = (centers[:, 1] + 0.5) * scale_y - 0.5
+    return scaled, max(radius * scale_x, _MIN_SCALED_RADIUS), max(radius * scale_y, _MIN_SCALED_RADIUS)
+
+
+def fill_spans(rows, starts, ends, y0, y1, x0, x1):
+    """
+    在窗口 [y0, y1) x [x0, x1) 内把区间填充为布尔覆盖图（区间需已合并）。
+    """
+    diff = np.zeros((y1 - y0, x1 - x0 + 1), dtype=np.int8)
+    diff[rows - y0, starts - x0] = 1
+    diff[rows - y0, ends - x0 + 1] = -1
+    return np.cumsum(diff[:, :-1], axis=1, dtype=np.int8).view(bool)
+
+
+class TiledMask:
+    """
+    分块（tile）存储的二值遮罩：只为被笔画触及的块分配内存，擦除后变空的块会被释放。
+    - copy() 为写时复制：共享所有块，只有被修改的块才会真正拷贝（用于增量绘制缓存）
+    - write_into(out) 把结果一次性写入调用方分配好的 float32 数组，不产生中间整图副本
+    """
+
+    def __init__(self, height, width, tile_size=256):
+        self.height = height
+        self.width = width
+        self.tile_size = tile_size
+        self._tiles = {}
+        self._owned = set()
+
+    def copy(self):
+        clone = TiledMask(self.height, self.width, self.tile_size)
+        clone._tiles = dict(self._tiles)
+        # 复制后双方都不再独占任何块，之后谁先写谁拷贝
+        self._owned = set()
+        return clone
+
+    def draw_strokes(self, strokes, threads=1):
+        """
+        按顺序绘制/擦除多条笔画 [(centers, rx, ry, erase), ...]。
+        threads > 1 时分轮处理：每轮按顺序取展开行数合计约 _SPAN_BLOCK_ROWS 的一批圆心块，
+        每个线程计算其中一小块的区间，再按块行把画布分成横带并行填充。不同横带写入不同的块，每个横带内部仍按原顺序应用，
+        结果与串行完全一致；同一时刻只保留这一轮的区间，峰值内存与串行相当。
+        """
+        if not strokes:
+            return
+        n_bands = (self.height + self.tile_size - 1) // self.tile_size
+        threads = min(threads, n_bands)
+
+        if threads <= 1:
+            for centers, rx, ry, erase in strokes:
+                for rows, starts, ends in stroke_span_blocks(centers, rx, ry, self.height, self.width):
+                    self.apply_spans(rows, starts, ends, erase)
+            return
+
+        def spans_of(job):
+            block, rx, ry, erase = job
+            return stroke_spans(block, rx, ry, self.height, self.width) + (erase,)
+
+        def fill_band(ty, spans):
+            for rows, starts, ends, erase in spans:
+                self.apply_spans(rows, starts, ends, erase, tile_rows=(ty, ty + 1))
+
+        def rounds():
+            batch, budget = [], 0
+            for centers, rx, ry, erase in strokes:
+                for block in center_blocks(centers, ry, _SPAN_BLOCK_ROWS // threads):
+                    batch.append((block, rx, ry, erase))
+                    budget += len(block) * _rows_per_center(ry)
+                    if budget >= _SPAN_BLOCK_ROWS:
+                        yield batch
+                        batch, budget = [], 0
+            if batch:
+                yield batch
+
+        # numpy 在排序、cumsum 等大数组运算时释放 GIL，线程池即可利用多核
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for batch in rounds():
+                spans = [s for s in pool.map(spans_of, batch) if len(s[0])]
+                list(pool.map(fill_band, range(n_bands), [spans] * n_bands))
+
+    def apply_spans(self, rows, starts, ends, erase=False, tile_rows=None):
+        """
+        应用 stroke_spans 生成的合并区间，逐块填充。
+        tile_rows=(ty0, ty1) 时只处理这几行块（并行横带使用）。
+        """
+        if len(rows) == 0:
+            return
+        t = self.tile_size
+        ty_lo, ty_hi = int(rows[0]) // t, int(rows[-1]) // t + 1
+        if tile_rows is not None:
+            ty_lo, ty_hi = max(ty_lo, tile_rows[0]), min(ty_hi, tile_rows[1])
+        for ty in range(ty_lo, ty_hi):
+            band_y0 = ty * t
+            band_y1 = min(band_y0 + t, self.height)
+            lo, hi = np.searchsorted(rows, [band_y0, band_y1])
+            if lo == hi:
+                continue
+            b_rows, b_starts, b_ends = rows[lo:hi], starts[lo:hi], ends[lo:hi]
+            for tx in range(int(b_starts.min()) // t, int(b_ends.max()) // t + 1):
+                tile_x0 = tx * t
+                tile_x1 = min(tile_x0 + t, self.width)
+                hit = (b_starts < tile_x1) & (b_ends >= tile_x0)
+                if not hit.any():
+                    continue
+                key = (ty, tx)
+                if erase and key not in self._tiles:
+                    continue
+                cover = fill_spans(
+                    b_rows[hit], np.maximum(b_starts[hit], tile_x0), np.minimum(b_ends[hit], tile_x1 - 1),
+                    band_y0, band_y1, tile_x0, tile_x1,
+                )
+                tile = self._writable_tile(key, band_y1 - band_y0, tile_x1 - tile_x0)
+                if erase:
+                    tile &= ~cover
+                    if not tile.any():
+                        del self._tiles[key]
+                        self._owned.discard(key)
+                else:
+                    tile |= cover
+
+    def write_into(self, out):
+        """把遮罩写入形状为 (height, width) 的数组（未触及区域保持 out 原值，通常为 0）。"""
+        t = self.tile_size
+        for (ty, tx), tile in self._tiles.items():
+            y0, x0 = ty * t, tx * t
+            np.copyto(out[y0:y0 + tile.shape[0], x0:x0 + tile.shape[1]], tile)
+
+    def _writable_tile(self, key, h, w):
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = np.zeros((h, w), dtype=bool)
+        elif key not in self._owned:
+            tile = tile.copy()
+        self._tiles[key] = tile
+        self._owned.add(key)
+        return tile
@@ -0,0 +1,61 @@
+import json
+import os
+
+import folder_paths
+
+
+def parse_image_ref(raw):
+    """
+    解析前端写入的图片引用，返回 {"filename", "subfolder", "type"} 或 None。
+    支持两种写法：
+    - JSON：{"filename": "a.png", "subfolder": "", "type": "input"}（与 /upload/image 返回一致）
+    - 字符串：ComfyUI 标注路径 "sub/a.png [temp]"，缺省类型为 input
+    """
+    if isinstance(raw, dict):
+        meta = raw
+    else:
+        raw = (raw or "").strip()
+        if not raw:
+            return None
+        if raw.startswith("{"):
+            try:
+                meta = json.loads(raw)
+            except ValueError:
+                return None
+        else:
+            ftype = "input"
+            for candidate in ("input", "temp", "output"):
+                suffix = f" [{candidate}]"
+                if raw.endswith(suffix):
+                    raw, ftype = raw[: -len(suffix)], candidate
+                    break
+            subfolder, filename = os.path.split(raw)
+            meta = {"filename": filename, "subfolder": subfolder, "type": ftype}
+    if not isinstance(meta, dict) or not (meta.get("filename") or meta.get("name")):
+        return None
+    return meta
+
+
+def resolve_image_path(meta: dict) -> str:
+    """
+    把图片引用解析为 ComfyUI input/temp/output 目录下的绝对路径。
+    路径越出对应目录（如包含 .. 或指向其他盘符）时返回空字符串。
+    """
+    filename = meta.get("filename") or meta.get("name")
+    subfolder = meta.get("subfolder", "")
+    ftype = meta.get("type", "input")
+    base = {
+        "temp": folder_paths.get_temp_directory,
+        "input": folder_paths.get_input_directory,
+        "output": folder_paths.get_output_directory,
+    }.get(ftype, folder_paths.get_temp_directory)()
+    base = os.path.abspath(base)
+    path = os.path.abspath(os.path.join(base, subfolder, filename))
+    try:
+        inside = os.path.commonpath([base, path]) == base
+    except ValueError:
+        # Windows 上引用指向其他盘符时 commonpath 会抛错，同样视为越界
+        inside = False
+    if not inside:
+        return ""
+    return path